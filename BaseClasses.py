@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import abc
 import collections
 import functools
 import logging
@@ -9,8 +10,8 @@ from argparse import Namespace
 from collections import Counter, deque
 from collections.abc import Collection, MutableSequence
 from enum import IntEnum, IntFlag
-from typing import (AbstractSet, Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Literal, Mapping, NamedTuple,
-                    Optional, Protocol, Set, Tuple, Union, TYPE_CHECKING)
+from typing import (AbstractSet, Any, Callable, ClassVar, DefaultDict, Dict, Iterable, Iterator, List, Literal, Mapping,
+                    NamedTuple, Optional, Protocol, Set, Tuple, Union, TYPE_CHECKING)
 import dataclasses
 
 from typing_extensions import NotRequired, TypedDict
@@ -518,10 +519,17 @@ class MultiWorld():
                                            for player in self.regions.location_cache))
 
     def get_unfilled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is None]
+        if player is not None:
+            return [location for location in self.regions.location_cache[player].values() if location.item is None]
+        return [location for locations in self.regions.location_cache.values() for location in locations.values()
+                if location.item is None]
 
     def get_filled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is not None]
+        if player is not None:
+            return [location for location in self.regions.location_cache[player].values()
+                    if location.item is not None]
+        return [location for locations in self.regions.location_cache.values() for location in locations.values()
+                if location.item is not None]
 
     def get_reachable_locations(self, state: Optional[CollectionState] = None, player: Optional[int] = None) -> List[Location]:
         state: CollectionState = state if state else self.state
@@ -575,24 +583,22 @@ class MultiWorld():
         prog_locations = {location for location in base_locations if location.item
                           and location.item.advancement and location not in state.locations_checked}
 
-        while prog_locations:
-            sphere: Set[Location] = set()
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-            for location in prog_locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+        with SweepTracker(state, prog_locations) as tracker:
+            while tracker.remaining:
+                # build up spheres of collection radius.
+                # Everything in each sphere is independent from each other in dependencies
+                # and only depends on lower spheres
+                sphere = tracker.find_reachable()
 
-            if not sphere:
-                # ran out of places and did not finish yet, quit
-                return False
+                if not sphere:
+                    # ran out of places and did not finish yet, quit
+                    return False
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-            prog_locations -= sphere
+                for location in sphere:
+                    state.collect(location.item, True, location)
 
-            if self.has_beaten_game(state):
-                return True
+                if self.has_beaten_game(state):
+                    return True
 
         return False
 
@@ -605,23 +611,18 @@ class MultiWorld():
         unreachable locations.
         """
         state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
 
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
+        with SweepTracker(state, self.get_filled_locations()) as tracker:
+            while tracker.remaining:
+                sphere = tracker.find_reachable()
+                yield sphere
+                if not sphere:
+                    if tracker.remaining:
+                        yield tracker.remaining  # unreachable locations
+                    break
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+                for location in sphere:
+                    state.collect(location.item, True, location)
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -739,6 +740,12 @@ class CollectionState():
     allow_partial_entrances: bool
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
+    _journal: Optional[List[Tuple[Callable[[Any], None], Any]]]
+    """undo log of (undo_function, argument) while a checkpoint is active, None otherwise"""
+    _saved_players: Optional[Set[int]]
+    """players whose inventory and reachability have been saved to the journal since the innermost checkpoint"""
+    _sweep_tracker: Optional[SweepTracker]
+    """the SweepTracker recording reads and writes of this state, None outside of tracked sweeps"""
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
         assert parent.worlds, "CollectionState created without worlds initialized in parent"
@@ -751,30 +758,128 @@ class CollectionState():
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
         self.allow_partial_entrances = allow_partial_entrances
+        self._journal = None
+        self._saved_players = None
+        self._sweep_tracker = None
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
             for item in items:
                 self.collect(item, True)
 
-    def update_reachable_regions(self, player: int):
+    def update_reachable_regions(self, player: int, retest_all: bool = True):
+        """
+        Searches for the regions the player can reach.
+
+        :param retest_all: If False, searches during a tracked sweep of a world without explicit indirect conditions
+            only retest the blocked entrances whose access rules read an item count or region that changed since the
+            player's last search of the sweep. Region.can_reach searches stale regions this way.
+        """
+        if self._journal is not None and player not in self._saved_players:
+            self._save_player(player)
+        tracker = self._sweep_tracker
+        if tracker is not None:
+            # the search is not part of the rule being tested, as its results are tracked through Region.can_reach
+            testing, tracker.testing = tracker.testing, None
+            testing_entrance, tracker.testing_entrance = tracker.testing_entrance, None
+            counter = self.prog_items[player]
+            counter.__class__ = Counter
+            try:
+                self._update_reachable_regions(player, tracker, retest_all)
+            finally:
+                counter.__class__ = _TrackedCounter
+                tracker.testing = testing
+                tracker.testing_entrance = testing_entrance
+            tracker.updated_players.add(player)
+        else:
+            self._update_reachable_regions(player)
+
+    def _update_reachable_regions(self, player: int, tracker: Optional[SweepTracker] = None,
+                                  retest_all: bool = True) -> None:
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        blocked_connections = self.blocked_connections[player]
         start: Region = world.get_region(world.origin_region_name)
+        # nothing but the state changes during a sweep, so what the access rules read can be tracked until it ends
+        tracked = tracker is not None and not world.explicit_indirect_conditions and world.sweep_dependency_tracking
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
+            queue = deque(blocked_connections)
             reachable_regions.add(start)
-            self.blocked_connections[player].update(start.exits)
+            blocked_connections.update(start.exits)
             queue.extend(start.exits)
+        elif tracked and not retest_all and player in tracker.entrance_item_dependents:
+            queue = deque(tracker.get_entrances_to_retest(player))
+        else:
+            queue = deque(blocked_connections)
 
-        if world.explicit_indirect_conditions:
+        if tracked:
+            tracker.search_writes[player].clear()
+            self._update_reachable_regions_tracked(player, queue, tracker)
+        elif world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
 
+    def _update_reachable_regions_tracked(self, player: int, queue: deque, tracker: SweepTracker):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        region_dependents = tracker.entrance_region_dependents
+        untracked = tracker.untracked_entrances[player]
+        item_dependents = tracker.entrance_item_dependents.get(player)
+        if item_dependents is None:
+            item_dependents = tracker.entrance_item_dependents[player] = collections.defaultdict(set)
+        counter = self.prog_items[player]
+        counter._entrance_dependents = item_dependents
+        counter._untracked_entrances = untracked
+
+        def can_reach_recording(entrance: Entrance) -> bool:
+            counter.__class__ = _SearchedCounter
+            counter._entrance = tracker.testing_entrance = entrance
+            try:
+                return entrance.can_reach(self)
+            finally:
+                counter.__class__ = Counter
+                tracker.testing_entrance = None
+
+        # only the reads of entrances that stay blocked matter, so entrances that were blocked before are tested while
+        # recording right away, while new exits, which mostly are passable, are only tested again if they aren't
+        retested = set(queue)
+        try:
+            # run BFS on the queued connections, and keep track of those blocked by missing items
+            while queue:
+                connection = queue.popleft()
+                new_region = connection.connected_region
+                if new_region in reachable_regions:
+                    blocked_connections.remove(connection)
+                    continue
+                if connection in retested:
+                    reachable = can_reach_recording(connection)
+                else:
+                    reachable = connection.can_reach(self) or can_reach_recording(connection)
+                if reachable:
+                    if self.allow_partial_entrances and not new_region:
+                        # connecting the entrance changes the outcome without changing what its rule reads
+                        untracked.add(connection)
+                        continue
+                    assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                    reachable_regions.add(new_region)
+                    blocked_connections.remove(connection)
+                    blocked_connections.update(new_region.exits)
+                    queue.extend(new_region.exits)
+                    self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+                    # Retry connections whose rules read the new region while it was unreachable
+                    for new_entrance in region_dependents.pop(new_region, ()):
+                        if new_entrance in blocked_connections and new_entrance not in queue:
+                            queue.append(new_entrance)
+                            retested.add(new_entrance)
+        finally:
+            del counter._entrance_dependents, counter._untracked_entrances
+            counter.__dict__.pop("_entrance", None)
+
     def _update_reachable_regions_explicit_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
@@ -839,6 +944,79 @@ class CollectionState():
             ret = function(self, ret)
         return ret
 
+    def checkpoint(self) -> int:
+        """
+        Starts recording changes to this state, so they can be undone with `rollback` without copying the state.
+        Only the players touched after the checkpoint are saved, so exploring a hypothetical state and reverting it
+        costs time proportional to the change instead of the size of the multiworld. Checkpoints can be nested.
+
+        :return: Token to pass to `rollback` or `commit`.
+        """
+        if self._journal is None:
+            self._journal = []
+        token = len(self._journal)
+        # state held by LogicMixins can't be journaled, so it is snapshotted the same way copy() would
+        mixin_state: Optional[CollectionState] = None
+        if self.additional_copy_functions:
+            mixin_state = CollectionState.__new__(CollectionState)
+            mixin_state.multiworld = self.multiworld
+            for function in self.additional_copy_functions:
+                mixin_state = function(self, mixin_state)
+        self._journal.append((self._restore_checkpoint, (len(self.path), mixin_state, self._saved_players)))
+        self._saved_players = set()
+        return token
+
+    def rollback(self, token: int) -> None:
+        """
+        Reverts this state to how it was when `checkpoint` returned `token`.
+        Rolling back the outermost checkpoint stops recording.
+        """
+        journal = self._journal
+        assert journal is not None and token < len(journal), "rollback called without matching checkpoint"
+        while len(journal) > token:
+            undo, argument = journal.pop()
+            undo(argument)
+        if not token:
+            self._journal = None
+
+    def commit(self, token: int) -> None:
+        """
+        Keeps the changes made since `checkpoint` returned `token`.
+        Changes inside a nested checkpoint remain revertible by rolling back an outer checkpoint.
+        """
+        journal = self._journal
+        assert journal is not None and token < len(journal), "commit called without matching checkpoint"
+        if not token:
+            self._journal = None
+            self._saved_players = None
+        else:
+            # a player saved by the committed checkpoint was untouched before it, so the save is valid for the outer one
+            outer_saved_players: Set[int] = journal[token][1][2]
+            outer_saved_players |= self._saved_players
+            self._saved_players = outer_saved_players
+
+    def _save_player(self, player: int) -> None:
+        self._saved_players.add(player)
+        self._journal.append((self._restore_player, (player, self.prog_items[player].copy(),
+                                                     self.reachable_regions[player].copy(),
+                                                     self.blocked_connections[player].copy(), self.stale[player])))
+
+    def _restore_player(self, saved: Tuple[int, Counter[str], Set[Region], Set[Entrance], bool]) -> None:
+        player, self.prog_items[player], self.reachable_regions[player], self.blocked_connections[player], \
+            self.stale[player] = saved
+
+    def _restore_checkpoint(self, saved: Tuple[int, Optional[CollectionState], Optional[Set[int]]]) -> None:
+        path_length, mixin_state, self._saved_players = saved
+        # path only ever grows while a checkpoint is active and dicts are insertion ordered
+        path = self.path
+        for _ in range(len(path) - path_length):
+            path.popitem()
+        for function in self.additional_init_functions:
+            function(self, self.multiworld)
+        if mixin_state is not None:
+            for function in self.additional_copy_functions:
+                function(mixin_state, self)
+
     def can_reach(self,
                   spot: Union[Location, Entrance, Region, str],
                   resolution_hint: Optional[str] = None,
@@ -871,18 +1049,21 @@ class CollectionState():
 
     def sweep_for_advancements(self, locations: Optional[Iterable[Location]] = None) -> None:
         if locations is None:
-            locations = self.multiworld.get_filled_locations()
-        reachable_advancements = True
+            # unfilled locations can't hold advancements, so they are filtered out below without a list of their own
+            locations = self.multiworld.get_locations()
         # since the loop has a good chance to run more than once, only filter the advancements once
         locations = {location for location in locations if location.advancement and location not in self.advancements}
 
-        while reachable_advancements:
-            reachable_advancements = {location for location in locations if location.can_reach(self)}
-            locations -= reachable_advancements
-            for advancement in reachable_advancements:
-                self.advancements.add(advancement)
-                assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
-                self.collect(advancement.item, True, advancement)
+        with SweepTracker(self, locations) as tracker:
+            reachable_advancements = tracker.find_reachable()
+            while reachable_advancements:
+                if self._journal is not None:
+                    self._journal.append((self.advancements.difference_update, reachable_advancements))
+                for advancement in reachable_advancements:
+                    self.advancements.add(advancement)
+                    assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
+                    self.collect(advancement.item, True, advancement)
+                reachable_advancements = tracker.find_reachable()
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
@@ -1006,6 +1187,11 @@ class CollectionState():
 
     # Item related
     def collect(self, item: Item, prevent_sweep: bool = False, location: Optional[Location] = None) -> bool:
+        if self._journal is not None:
+            if item.player not in self._saved_players:
+                self._save_player(item.player)
+            if location and location not in self.locations_checked:
+                self._journal.append((self.locations_checked.discard, location))
         if location:
             self.locations_checked.add(location)
 
@@ -1030,6 +1216,7 @@ class CollectionState():
         self.prog_items[player][item] += count
 
     def remove(self, item: Item):
+        assert self._journal is None, "can't remove items from a state with an active checkpoint, use rollback instead"
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
             # invalidate caches, nothing can be trusted anymore now
@@ -1065,6 +1252,298 @@ class CollectionState():
             self.prog_items[player][item] = count
 
 
+class _RecordingCounter(Counter, metaclass=abc.ABCMeta):
+    """
+    Base of the prog_items Counters that record which item names are read by the rule being tested.
+    Counters are only turned into a subclass by a SweepTracker, and turned back after.
+    """
+
+    @abc.abstractmethod
+    def _read(self, item: Optional[str]) -> None:
+        """Records that the item was read, or the whole Counter if item is None."""
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self._read(item)
+        return dict.get(self, item, default)
+
+    def __contains__(self, item: object) -> bool:
+        self._read(item)
+        return dict.__contains__(self, item)
+
+    def __iter__(self) -> Iterator[str]:
+        self._read(None)
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._read(None)
+        return dict.__len__(self)
+
+    def keys(self):
+        self._read(None)
+        return dict.keys(self)
+
+    def values(self):
+        self._read(None)
+        return dict.values(self)
+
+    def items(self):
+        self._read(None)
+        return dict.items(self)
+
+    def total(self) -> int:
+        self._read(None)
+        return sum(dict.values(self))
+
+    def copy(self) -> Counter[str]:
+        self._read(None)
+        return Counter(dict(dict.items(self)))
+
+
+class _TrackedCounter(_RecordingCounter):
+    """
+    A player's prog_items Counter that tells its SweepTracker which item names were read by the location being tested,
+    and which were written. Anything that reads or writes the Counter as a whole is recorded with the item name None.
+    """
+    _tracker: SweepTracker
+    _dependents: DefaultDict[Optional[str], Set[Location]]
+    _written: Set[Optional[str]]
+    _search_written: Set[Optional[str]]
+
+    def _read(self, item: Optional[str]) -> None:
+        if self._tracker.testing is not None:
+            self._dependents[item].add(self._tracker.testing)
+
+    def __getitem__(self, item: str) -> int:
+        if self._tracker.testing is not None:
+            self._dependents[item].add(self._tracker.testing)
+        return dict.get(self, item, 0)
+
+    def __setitem__(self, item: str, count: int) -> None:
+        self._written.add(item)
+        self._search_written.add(item)
+        dict.__setitem__(self, item, count)
+
+    def __delitem__(self, item: str) -> None:
+        self._written.add(item)
+        self._search_written.add(item)
+        if dict.__contains__(self, item):
+            dict.__delitem__(self, item)
+
+    def update(self, *args, **kwargs) -> None:
+        self._written.add(None)
+        self._search_written.add(None)
+        super().update(*args, **kwargs)
+
+    def subtract(self, *args, **kwargs) -> None:
+        self._written.add(None)
+        self._search_written.add(None)
+        super().subtract(*args, **kwargs)
+
+    def pop(self, *args):
+        self._written.add(None)
+        self._search_written.add(None)
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._written.add(None)
+        self._search_written.add(None)
+        return dict.popitem(self)
+
+    def setdefault(self, *args):
+        self._written.add(None)
+        self._search_written.add(None)
+        return dict.setdefault(self, *args)
+
+    def clear(self) -> None:
+        self._written.add(None)
+        self._search_written.add(None)
+        dict.clear(self)
+
+
+class _SearchedCounter(_RecordingCounter):
+    """
+    prog_items Counter of the player whose regions a SweepTracker is searching, which records the item names read by the
+    entrance being tested. Anything that reads the Counter as a whole makes the entrance untracked.
+    """
+    _entrance: Entrance
+    _entrance_dependents: DefaultDict[str, Set[Entrance]]
+    _untracked_entrances: Set[Entrance]
+
+    def _read(self, item: Optional[str]) -> None:
+        if item is None:
+            self._untracked_entrances.add(self._entrance)
+        else:
+            self._entrance_dependents[item].add(self._entrance)
+
+    def __getitem__(self, item: str) -> int:
+        self._entrance_dependents[item].add(self._entrance)
+        return dict.get(self, item, 0)
+
+
+class SweepTracker:
+    """
+    Finds the reachable locations of a growing CollectionState again and again, while only retesting the locations
+    whose access rules read an item count or an unreachable region that changed since they were last tested.
+    Reads are recorded on every test, so rules that short-circuit differently depending on the state stay correct.
+
+    Locations of worlds that disable `World.sweep_dependency_tracking`, and locations or regions that override
+    `can_reach`, are retested every time, as is everything if the state can't be tracked.
+    Has to be entered as a context manager, during which the state's prog_items are recording.
+
+    Searches for reachable regions of worlds without explicit indirect conditions are tracked the same way, so that
+    after the first search of the sweep they only retest the blocked entrances whose access rules read an item count
+    or an unreachable region that changed, instead of every blocked entrance until nothing changes anymore.
+    """
+    state: CollectionState
+    remaining: Set[Location]
+    """locations that have not been found reachable yet"""
+    testing: Optional[Location]
+    """the location whose access rule is being tested"""
+    item_dependents: Dict[int, DefaultDict[Optional[str], Set[Location]]]
+    """locations to retest per player and item name, item name None for reads of the whole inventory"""
+    item_writes: Dict[int, Set[Optional[str]]]
+    """item names per player written since the last search, None if unknown"""
+    region_dependents: DefaultDict[Region, Set[Location]]
+    """locations to retest when an unreachable region they read becomes reachable"""
+    updated_players: Set[int]
+    """players whose reachable regions were updated since the last search"""
+    testing_entrance: Optional[Entrance]
+    """the entrance whose access rule is being tested by a region search"""
+    entrance_item_dependents: Dict[int, DefaultDict[str, Set[Entrance]]]
+    """blocked entrances to retest per player and item name of that player"""
+    entrance_region_dependents: DefaultDict[Region, Set[Entrance]]
+    """blocked entrances of the region's player to retest when the region becomes reachable"""
+    untracked_entrances: DefaultDict[int, Set[Entrance]]
+    """blocked entrances per player that are retested by every search, as their access rules read something else,
+    like the whole inventory or other players' regions"""
+    search_writes: Dict[int, Set[Optional[str]]]
+    """item names per player written since their last region search, None if unknown"""
+    _pending: Set[Location]
+    _untracked: Set[Location]
+    _installed: bool
+    _searched: bool
+
+    def __init__(self, state: CollectionState, locations: Iterable[Location]):
+        self.state = state
+        self.remaining = set(locations)
+        self.testing = None
+        self.item_dependents = {}
+        self.item_writes = {}
+        self.region_dependents = collections.defaultdict(set)
+        self.updated_players = set()
+        self.testing_entrance = None
+        self.entrance_item_dependents = {}
+        self.entrance_region_dependents = collections.defaultdict(set)
+        self.untracked_entrances = collections.defaultdict(set)
+        self.search_writes = {}
+        self._pending = set()
+        self._untracked = set()
+        self._installed = False
+        self._searched = False
+
+    def __enter__(self) -> SweepTracker:
+        state = self.state
+        if state._sweep_tracker is not None or \
+                any(type(counter) is not Counter for counter in state.prog_items.values()):
+            # nested sweeps and custom inventories aren't tracked, so search the naive way
+            self._untracked = self.remaining.copy()
+            return self
+        worlds = state.multiworld.worlds
+        trackable: Dict[Tuple[int, type, type], bool] = {}
+        for location in self.remaining:
+            key = (location.player, type(location), type(location.parent_region))
+            if key not in trackable:
+                trackable[key] = worlds[location.player].sweep_dependency_tracking and \
+                    key[1].can_reach is Location.can_reach and key[2].can_reach is Region.can_reach
+            if trackable[key]:
+                self._pending.add(location)
+            else:
+                self._untracked.add(location)
+        state._sweep_tracker = self
+        for player, counter in state.prog_items.items():
+            counter.__class__ = _TrackedCounter
+            counter._tracker = self
+            counter._dependents = self.item_dependents[player] = collections.defaultdict(set)
+            counter._written = self.item_writes[player] = set()
+            counter._search_written = self.search_writes[player] = set()
+        self._installed = True
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self._installed:
+            self._installed = False
+            self.state._sweep_tracker = None
+            for counter in self.state.prog_items.values():
+                if type(counter) is _TrackedCounter:
+                    counter.__class__ = Counter
+                    del counter._tracker, counter._dependents, counter._written, counter._search_written
+
+    def find_reachable(self) -> Set[Location]:
+        """Returns the remaining locations that are reachable with the current state and removes them from remaining."""
+        state = self.state
+        if self._searched:
+            self._update_pending()
+        self._searched = True
+        reachable: Set[Location] = set()
+        for location in self._pending:
+            self.testing = location
+            if location.can_reach(state):
+                reachable.add(location)
+        self.testing = None
+        self._pending = set()
+        for location in self._untracked:
+            if location.can_reach(state):
+                reachable.add(location)
+        self._untracked -= reachable
+        self.remaining -= reachable
+        return reachable
+
+    def _update_pending(self) -> None:
+        state = self.state
+        pending = self._pending
+        if self.region_dependents:
+            for player in {region.player for region in self.region_dependents}:
+                if state.stale[player]:
+                    state.update_reachable_regions(player, retest_all=False)
+            # regions may also have been updated outside of rule tests, such as by completion conditions
+            updated_players = self.updated_players
+            for region in [region for region in self.region_dependents if region.player in updated_players]:
+                if region in state.reachable_regions[region.player]:
+                    pending |= self.region_dependents.pop(region)
+        self.updated_players.clear()
+        for player, written in self.item_writes.items():
+            if written:
+                dependents = self.item_dependents[player]
+                if None in written:
+                    # no idea what changed, so every read of this player's items is affected
+                    for locations in dependents.values():
+                        pending |= locations
+                    dependents.clear()
+                else:
+                    for item in written:
+                        if item in dependents:
+                            pending |= dependents.pop(item)
+                    if None in dependents:
+                        pending |= dependents.pop(None)
+                written.clear()
+        pending &= self.remaining
+
+    def get_entrances_to_retest(self, player: int) -> Set[Entrance]:
+        """Returns the blocked entrances of the player whose access rules read an item count written since the
+        player's last region search, or something that isn't tracked."""
+        blocked_connections = self.state.blocked_connections[player]
+        written = self.search_writes[player]
+        if None in written:
+            return set(blocked_connections)
+        retest = set(self.untracked_entrances[player])
+        item_dependents = self.entrance_item_dependents[player]
+        for item in written:
+            if item in item_dependents:
+                retest |= item_dependents[item]
+        retest &= blocked_connections
+        return retest
+
+
 class EntranceType(IntEnum):
     ONE_WAY = 1
     TWO_WAY = 2
@@ -1228,8 +1707,20 @@ class Region:
 
     def can_reach(self, state: CollectionState) -> bool:
         if state.stale[self.player]:
-            state.update_reachable_regions(self.player)
-        return self in state.reachable_regions[self.player]
+            state.update_reachable_regions(self.player, retest_all=False)
+        if self in state.reachable_regions[self.player]:
+            return True
+        # reachable regions stay reachable during a sweep, so only unreachable ones are dependencies
+        tracker = state._sweep_tracker
+        if tracker is not None:
+            if tracker.testing is not None:
+                tracker.region_dependents[self].add(tracker.testing)
+            elif tracker.testing_entrance is not None:
+                if tracker.testing_entrance.player == self.player:
+                    tracker.entrance_region_dependents[self].add(tracker.testing_entrance)
+                else:
+                    tracker.untracked_entrances[tracker.testing_entrance.player].add(tracker.testing_entrance)
+        return False
 
     @property
     def hint_text(self) -> str:
@@ -1457,6 +1948,13 @@ class ItemClassification(IntFlag):
         return int(self & 0b0111)
 
 
+# plain ints of the classification flags, for the checks on Item below
+_PROGRESSION = ItemClassification.progression.value
+_USEFUL = ItemClassification.useful.value
+_TRAP = ItemClassification.trap.value
+_PROGRESSION_SKIP_BALANCING = ItemClassification.progression_skip_balancing.value
+
+
 class Item:
     game: str = "Generic"
     __slots__ = ("name", "classification", "code", "player", "location")
@@ -1482,21 +1980,24 @@ class Item:
     def pedestal_hint_text(self) -> str:
         return getattr(self, "_pedestal_hint_text", self.name.replace("_", " ").replace("-", " "))
 
+    # these are checked for every location in sweeps and fill, so they test the bits of the plain int,
+    # as the operators of IntFlag and Flag.__contains__ are several times slower
+
     @property
     def advancement(self) -> bool:
-        return ItemClassification.progression in self.classification
+        return bool(int(self.classification) & _PROGRESSION)
 
     @property
     def skip_in_prog_balancing(self) -> bool:
-        return ItemClassification.progression_skip_balancing in self.classification
+        return int(self.classification) & _PROGRESSION_SKIP_BALANCING == _PROGRESSION_SKIP_BALANCING
 
     @property
     def useful(self) -> bool:
-        return ItemClassification.useful in self.classification
+        return bool(int(self.classification) & _USEFUL)
 
     @property
     def trap(self) -> bool:
-        return ItemClassification.trap in self.classification
+        return bool(int(self.classification) & _TRAP)
 
     @property
     def filler(self) -> bool:
@@ -1575,35 +2076,38 @@ class Spoiler:
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
+        with SweepTracker(state, prog_locations) as tracker:
+            sphere_candidates = tracker.remaining
+            while sphere_candidates:
 
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
+                # build up spheres of collection radius.
+                # Everything in each sphere is independent from each other in dependencies
+                # and only depends on lower spheres
 
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+                sphere = tracker.find_reachable()
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-
-            sphere_candidates -= sphere
-            collection_spheres.append(sphere)
-            state_cache.append(state.copy())
+                for location in sphere:
+                    state.collect(location.item, True, location)
 
-            logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere),
-                          len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in sphere_candidates]):
-                    raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
-                                       f'Something went terribly wrong here.')
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+                collection_spheres.append(sphere)
+                state_cache.append(state.copy())
+
+                logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
+                              len(sphere),
+                              len(prog_locations))
+                if not sphere:
+                    logging.debug('The following items could not be reached: %s', [
+                        '%s (Player %d) at %s (Player %d)' % (
+                            location.item.name, location.item.player, location.name, location.player)
+                        for location in sphere_candidates])
+                    if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal'
+                            for location in sphere_candidates]):
+                        raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
+                                           f'Something went terribly wrong here.')
+                    else:
+                        self.unreachables = sphere_candidates
+                        break
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
@@ -1651,20 +2155,22 @@ class Spoiler:
         required_locations = {item for sphere in collection_spheres for item in sphere}
         state = CollectionState(multiworld)
         collection_spheres = []
-        while required_locations:
-            sphere = set(filter(state.can_reach, required_locations))
+        with SweepTracker(state, required_locations) as tracker:
+            while tracker.remaining:
+                remaining_count = len(tracker.remaining)
+                sphere = tracker.find_reachable()
 
-            for location in sphere:
-                state.collect(location.item, True, location)
+                for location in sphere:
+                    state.collect(location.item, True, location)
 
-            collection_spheres.append(sphere)
+                collection_spheres.append(sphere)
 
-            logging.debug('Calculated final sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere), len(required_locations))
+                logging.debug('Calculated final sphere %i, containing %i of %i progress items.',
+                              len(collection_spheres), len(sphere), remaining_count)
 
-            required_locations -= sphere
-            if not sphere:
-                raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
+                if not sphere:
+                    raise RuntimeError(f'Not all required items reachable. '
+                                       f'Unreachable locations: {tracker.remaining}')
 
         # we can finally output our playthrough
         self.playthrough = {"0": sorted([self.multiworld.get_name_string_for_object(item) for item in
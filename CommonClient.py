@@ -22,8 +22,9 @@ if __name__ == "__main__":
     Utils.init_logging("TextClient", exception_logger="Client")
 
 from MultiServer import CommandProcessor
-from NetUtils import (Endpoint, decode, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
-                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, HintStatus, SlotType)
+from NetUtils import (Endpoint, decode, decode_compact, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission,
+                      NetworkSlot, RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes,
+                      HintStatus, SlotType)
 from Utils import Version, stream_input, async_start
 from worlds import network_data_package, AutoWorldRegister
 import os
@@ -184,6 +185,8 @@ class ClientCommandProcessor(CommandProcessor):
 
 class CommonContext:
     # The following attributes are used to Connect and should be adjusted as needed in subclasses
+    # add "CompactTuples" to receive lists of NetworkItem and NetworkPlayer as columns, if packets are only read
+    # through server_loop, which then decodes them with decode_compact
     tags: typing.Set[str] = {"AP"}
     game: typing.Optional[str] = None
     items_handling: typing.Optional[int] = None
@@ -809,7 +812,7 @@ async def server_loop(ctx: CommonContext, address: typing.Optional[str] = None)
         ctx.current_reconnect_delay = ctx.starting_reconnect_delay
         ctx.disconnected_intentionally = False
         async for data in ctx.server.socket:
-            for msg in decode(data):
+            for msg in (decode_compact if "CompactTuples" in ctx.tags else decode)(data):
                 await process_server_cmd(ctx, msg)
         logger.warning(f"Disconnected from multiworld server{reconnect_hint()}")
     except websockets.InvalidMessage:
@@ -1,10 +1,12 @@
 import collections
 import itertools
 import logging
+import math
 import typing
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock, \
+    SweepTracker
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -20,6 +22,56 @@ class FillError(RuntimeError):
         super().__init__(*args)
 
 
+T = typing.TypeVar("T")
+
+
+class _OrderedPool(typing.Generic[T]):
+    """
+    Keeps items or locations in their original order while removing any of them in constant time, by leaving a
+    tombstone in its slot that is only cleared out once they make up half of the slots.
+    Entries are told apart by identity, so each may only be in the pool once.
+    """
+    slots: typing.List[typing.Optional[T]]
+    index: typing.Dict[int, int]
+    """slot per id of entry"""
+
+    def __init__(self, entries: typing.Iterable[T] = ()) -> None:
+        self.slots = list(entries)
+        self.index = {id(entry): slot for slot, entry in enumerate(self.slots)}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __bool__(self) -> bool:
+        return bool(self.index)
+
+    def __contains__(self, entry: T) -> bool:
+        return id(entry) in self.index
+
+    def __iter__(self) -> typing.Iterator[T]:
+        for entry in self.slots:
+            if entry is not None:
+                yield entry
+
+    def append(self, entry: T) -> None:
+        self.index[id(entry)] = len(self.slots)
+        self.slots.append(entry)
+
+    def remove(self, entry: T) -> None:
+        self.slots[self.index.pop(id(entry))] = None
+        if len(self.slots) > 2 * len(self.index) + 16:
+            self.slots = list(self)
+            self.index = {id(entry): slot for slot, entry in enumerate(self.slots)}
+
+
+def _may_fill(location: Location, item: Item) -> bool:
+    """Returns False if location.can_fill rejects item regardless of the state it is given."""
+    if type(location).can_fill is not Location.can_fill or location.always_allow is not Location.always_allow:
+        return True
+    return (location.progress_type != LocationProgressType.EXCLUDED or not (item.advancement or item.useful)) \
+        and location.item_rule(item)
+
+
 def _log_fill_progress(name: str, placed: int, total_items: int) -> None:
     logging.info(f"Current fill step ({name}) at {placed}/{total_items} items placed.")
 
@@ -33,11 +85,25 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+def sweep_from_pool_in_place(state: CollectionState, itempool: typing.Iterable[Item] = tuple(),
+                             locations: typing.Optional[typing.List[Location]] = None) -> int:
+    """
+    Same as sweep_from_pool, but collects into state itself behind a checkpoint instead of into a copy.
+
+    :return: checkpoint token to pass to state.rollback to undo the sweep
+    """
+    checkpoint = state.checkpoint()
+    for item in itempool:
+        state.collect(item, True)
+    state.sweep_for_advancements(locations=locations)
+    return checkpoint
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
                      allow_partial: bool = False, allow_excluded: bool = False, one_item_per_player: bool = True,
-                     name: str = "Unknown") -> None:
+                     name: str = "Unknown", swap_limit: int = 0) -> None:
     """
     :param multiworld: Multiworld to be filled.
     :param base_state: State assumed before fill.
@@ -50,20 +116,43 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     :param allow_partial: only place what is possible. Remaining items will be in the item_pool list.
     :param allow_excluded: if true and placement fails, it is re-attempted while ignoring excluded on Locations
     :param name: name of this fill step for progress logging purposes
+    :param swap_limit: maximum number of swaps to attempt, as each costs a sweep, 0 for no limit
     """
     unplaced_items: typing.List[Item] = []
     placements: typing.List[Location] = []
     cleanup_required = False
     swapped_items: typing.Counter[typing.Tuple[int, str, bool]] = Counter()
+    swap_stats: typing.Counter[str] = Counter()
     reachable_items: typing.Dict[int, typing.Deque[Item]] = {}
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
+    # placed items and filled locations are taken out of these pools, and item_pool and locations are only updated
+    # at the end, so that a placement takes the same time no matter how many items and locations there are
+    pool: _OrderedPool[Item] = _OrderedPool(item_pool)
+    candidates: _OrderedPool[Location] = _OrderedPool(locations)
+    player_candidates: typing.Dict[int, _OrderedPool[Location]] = {}
+    if single_player_placement:
+        for location in locations:
+            player_candidates.setdefault(location.player, _OrderedPool()).append(location)
+
+    # hypothetical states are explored on private copies of base_state and rolled back after use,
+    # so each sweep costs time proportional to what it collected instead of a full copy
+    maximum_exploration_state = base_state.copy()
+    # items are placed from the back of reachable_items, so the maximum exploration state is kept as a sweep of the
+    # items that won't be placed soon, and only the few that will are collected and swept on top of it per placement.
+    # sweeping reaches the same state no matter the order items are collected in, so this changes nothing about fill.
+    stable_checkpoint: typing.Optional[int] = None
+    exploration_checkpoint: typing.Optional[int] = None
+    placed_soon: typing.List[Item] = []
+    placed_soon_ids: typing.Set[int] = set()
+    swept_unplaced = 0
+    swap_state: typing.Optional[CollectionState] = None
 
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
 
-    while any(reachable_items.values()) and locations:
+    while any(reachable_items.values()) and candidates:
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -71,26 +160,38 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
         else:
             next_player = multiworld.random.choice([player for player, items in reachable_items.items() if items])
             items_to_place = []
-            if item_pool:
+            if pool:
                 items_to_place.append(reachable_items[next_player].pop())
 
         for item in items_to_place:
-            # The items added into `reachable_items` are placed starting from the end of each deque in
-            # `reachable_items`, so the items being placed are more likely to be found towards the end of `item_pool`.
-            for p, pool_item in enumerate(reversed(item_pool), start=1):
-                if pool_item is item:
-                    del item_pool[-p]
-                    break
-
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+            pool.remove(item)
+
+        if exploration_checkpoint is None or any(id(item) not in placed_soon_ids for item in items_to_place):
+            # (re)build the stable part of the state, leaving out the items that are placed within the next
+            # few placements, balancing the cost of rebuilding against the cost of collecting them every time
+            if stable_checkpoint is not None:
+                maximum_exploration_state.rollback(stable_checkpoint)
+            soon_per_player = max(1, math.isqrt(len(pool) // len(reachable_items)))
+            placed_soon = [item for items in reachable_items.values()
+                           for item in itertools.islice(reversed(items), soon_per_player)]
+            placed_soon_ids = {id(item) for item in placed_soon}
+            stable_checkpoint = sweep_from_pool_in_place(
+                maximum_exploration_state,
+                itertools.chain((item for item in pool if id(item) not in placed_soon_ids), unplaced_items),
+                multiworld.get_filled_locations(item.player) if single_player_placement else None)
+            swept_unplaced = len(unplaced_items)
+        else:
+            maximum_exploration_state.rollback(exploration_checkpoint)
+        exploration_checkpoint = sweep_from_pool_in_place(
+            maximum_exploration_state,
+            itertools.chain((item for item in placed_soon if item in pool), unplaced_items[swept_unplaced:]),
+            multiworld.get_filled_locations(item.player) if single_player_placement else None)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not candidates:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
@@ -105,12 +206,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
+            for location in player_candidates.get(item_to_place.player, ()) if single_player_placement else candidates:
+                if location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
+                    spot_to_fill = location
+                    candidates.remove(location)
+                    if single_player_placement:
+                        player_candidates[location.player].remove(location)
                     break
 
             else:
@@ -127,27 +228,45 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                         swap_count = swapped_items[placed_item.player, placed_item.name, unsafe]
                         if swap_count > 1:
                             continue
+                        # rule out locations that can't take item_to_place in any state before sweeping for them
+                        if (single_player_placement and location.player != item_to_place.player) or \
+                                not _may_fill(location, item_to_place):
+                            swap_stats["ruled out"] += 1
+                            continue
+                        if swap_limit and swap_stats["attempted"] >= swap_limit:
+                            if not swap_stats["limited"]:
+                                logging.warning(f"{name} fill reached its limit of {swap_limit} swap attempts.")
+                            swap_stats["limited"] += 1
+                            break
+                        swap_stats["attempted"] += 1
 
                         location.item = None
                         placed_item.location = None
-                        swap_state = sweep_from_pool(base_state, [placed_item, *item_pool] if unsafe else item_pool,
-                                                     multiworld.get_filled_locations(item.player)
-                                                     if single_player_placement else None)
+                        if swap_state is None:
+                            swap_state = base_state.copy()
+                        swap_checkpoint = sweep_from_pool_in_place(
+                            swap_state, itertools.chain((placed_item,), pool) if unsafe else pool,
+                            multiworld.get_filled_locations(item.player) if single_player_placement else None)
                         # unsafe means swap_state assumes we can somehow collect placed_item before item_to_place
                         # by continuing to swap, which is not guaranteed. This is unsafe because there is no mechanic
                         # to clean that up later, so there is a chance generation fails.
-                        if (not single_player_placement or location.player == item_to_place.player) \
-                                and location.can_fill(swap_state, item_to_place, perform_access_check):
+                        can_swap = location.can_fill(swap_state, item_to_place, perform_access_check)
+                        swap_state.rollback(swap_checkpoint)
+                        if can_swap:
                             # Add this item to the existing placement, and
                             # add the old item to the back of the queue
                             spot_to_fill = placements.pop(i)
 
                             swap_count += 1
                             swapped_items[placed_item.player, placed_item.name, unsafe] = swap_count
+                            swap_stats["unsafe swaps" if unsafe else "swaps"] += 1
 
                             reachable_items[placed_item.player].appendleft(
                                 placed_item)
-                            item_pool.append(placed_item)
+                            pool.append(placed_item)
+                            # the stable part of the maximum exploration state may have collected placed_item from
+                            # its old location, so it has to be rebuilt
+                            exploration_checkpoint = None
 
                             # cleanup at the end to hopefully get better errors
                             cleanup_required = True
@@ -174,8 +293,13 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             if on_place:
                 on_place(spot_to_fill)
 
+    item_pool[:] = pool
+    locations[:] = candidates
+
     if total > 1000:
         _log_fill_progress(name, placed, total)
+    if swap_stats:
+        logging.debug(f"{name} fill swap statistics: {dict(swap_stats)}")
 
     if cleanup_required:
         # validate all placements and remove invalid ones
@@ -199,7 +323,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             for location in excluded_locations:
                 location.progress_type = location.progress_type.DEFAULT
             fill_restrictive(multiworld, base_state, excluded_locations, unplaced_items, single_player_placement, lock,
-                             swap, on_place, allow_partial, False)
+                             swap, on_place, allow_partial, False, swap_limit=swap_limit)
             for location in excluded_locations:
                 if not location.item:
                     location.progress_type = location.progress_type.EXCLUDED
@@ -449,7 +573,8 @@ def distribute_early_items(multiworld: MultiWorld,
 
 
 def distribute_items_restrictive(multiworld: MultiWorld,
-                                 panic_method: typing.Literal["swap", "raise", "start_inventory"] = "swap") -> None:
+                                 panic_method: typing.Literal["swap", "raise", "start_inventory"] = "swap",
+                                 swap_limit: int = 0) -> None:
     fill_locations = sorted(multiworld.get_unfilled_locations())
     multiworld.random.shuffle(fill_locations)
     # get items to distribute
@@ -512,7 +637,7 @@ def distribute_items_restrictive(multiworld: MultiWorld,
         maximum_exploration_state = sweep_from_pool(multiworld.state)
         if panic_method == "swap":
             fill_restrictive(multiworld, maximum_exploration_state, defaultlocations, progitempool, swap=True,
-                             name="Progression", single_player_placement=single_player)
+                             name="Progression", single_player_placement=single_player, swap_limit=swap_limit)
         elif panic_method == "raise":
             fill_restrictive(multiworld, maximum_exploration_state, defaultlocations, progitempool, swap=False,
                              name="Progression", single_player_placement=single_player)
@@ -744,31 +869,35 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                     balancing_reachables = reachable_locations_count.copy()
                     balancing_sphere = sphere_locations.copy()
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    while True:
-                        # Check locations in the current sphere and gather progression items to swap earlier
-                        for location in balancing_sphere:
-                            if location.advancement:
-                                balancing_state.collect(location.item, True, location)
-                                player = location.item.player
-                                # only replace items that end up in another player's world
-                                if (not location.locked and not location.item.skip_in_prog_balancing and
-                                        player in balancing_players and
-                                        location.player != player and
-                                        location.progress_type != LocationProgressType.PRIORITY):
-                                    candidate_items[player].add(location)
-                                    logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
-                        for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
-                            if not location.locked:
-                                balancing_reachables[location.player] += 1
-                        if multiworld.has_beaten_game(balancing_state) or all(
-                                item_percentage(player, reachables) >= threshold_percentages[player]
-                                for player, reachables in balancing_reachables.items()
-                                if player in threshold_percentages):
-                            break
-                        elif not balancing_sphere:
-                            raise RuntimeError("Not all required items reachable. Something went terribly wrong here.")
+                    # nothing is swapped until the balancing spheres are found, so only the locations whose access
+                    # rules read something that changed have to be retested for each of them
+                    with SweepTracker(balancing_state, balancing_unchecked_locations) as sphere_tracker:
+                        while True:
+                            # Check locations in the current sphere and gather progression items to swap earlier
+                            for location in balancing_sphere:
+                                if location.advancement:
+                                    balancing_state.collect(location.item, True, location)
+                                    player = location.item.player
+                                    # only replace items that end up in another player's world
+                                    if (not location.locked and not location.item.skip_in_prog_balancing and
+                                            player in balancing_players and
+                                            location.player != player and
+                                            location.progress_type != LocationProgressType.PRIORITY):
+                                        candidate_items[player].add(location)
+                                        logging.debug(f"Candidate item: {location.name}, {location.item.name}")
+                            balancing_sphere = sphere_tracker.find_reachable()
+                            for location in balancing_sphere:
+                                balancing_unchecked_locations.remove(location)
+                                if not location.locked:
+                                    balancing_reachables[location.player] += 1
+                            if multiworld.has_beaten_game(balancing_state) or all(
+                                    item_percentage(player, reachables) >= threshold_percentages[player]
+                                    for player, reachables in balancing_reachables.items()
+                                    if player in threshold_percentages):
+                                break
+                            elif not balancing_sphere:
+                                raise RuntimeError("Not all required items reachable. "
+                                                   "Something went terribly wrong here.")
                     # Gather a set of locations which we can swap items into
                     unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     for l in unchecked_locations:
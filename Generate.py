@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import copy
+import importlib
 import logging
 import os
 import random
@@ -11,7 +13,7 @@ import urllib.parse
 import urllib.request
 from collections import Counter
 from itertools import chain
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 import ModuleUpdate
 
@@ -122,22 +124,23 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
 
     player_id = 1
     player_files = {}
-    for file in os.scandir(args.player_files_path):
-        fname = file.name
-        if file.is_file() and not fname.startswith(".") and not fname.lower().endswith(".ini") and \
-                os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_for_file = []
-                for doc_idx, yaml in enumerate(read_weights_yamls(path)):
-                    if yaml is None:
-                        logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
-                    else:
-                        weights_for_file.append(yaml)
-                weights_cache[fname] = tuple(weights_for_file)
-                        
-            except Exception as e:
-                raise ValueError(f"File {fname} is invalid. Please fix your yaml.") from e
+    file_names = [file.name for file in os.scandir(args.player_files_path)
+                  if file.is_file() and not file.name.startswith(".") and not file.name.lower().endswith(".ini") and
+                  os.path.join(args.player_files_path, file.name) not in {args.meta_file_path, args.weights_file_path}]
+    file_jobs = [(os.path.join(args.player_files_path, fname),) for fname in file_names]
+    errors: list[tuple[str, Exception]] = []
+    for fname, yamls in zip(file_names, map_jobs(read_weights_yamls, file_jobs, get_process_count(len(file_jobs)))):
+        if isinstance(yamls, Exception):
+            errors.append((fname, yamls))
+            continue
+        weights_for_file = []
+        for doc_idx, yaml in enumerate(yamls):
+            if yaml is None:
+                logging.warning(f"Ignoring empty yaml document #{doc_idx + 1} in {fname}")
+            else:
+                weights_for_file.append(yaml)
+        weights_cache[fname] = tuple(weights_for_file)
+    raise_file_errors(errors)
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -165,7 +168,10 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
                         f"Provide a general weights file ({args.weights_file_path}) or individual player files. "
                         f"A mix is also permitted.")
 
+    import_worlds_lazily()
     from worlds.AutoWorld import AutoWorldRegister
+    for game in sorted(set(chain.from_iterable(get_games(yaml) for yamls in weights_cache.values() for yaml in yamls))):
+        AutoWorldRegister.world_types.load(game)
     from worlds.alttp.EntranceRandomizer import parse_arguments
     erargs = parse_arguments(['--multi', str(args.multi)])
     erargs.seed = seed
@@ -180,10 +186,6 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     erargs.name = {}
     erargs.csv_output = args.csv_output
 
-    settings_cache: dict[str, tuple[argparse.Namespace, ...]] = \
-        {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
-         for fname, yamls in weights_cache.items()}
-
     if meta_weights:
         for category_name, category_dict in meta_weights.items():
             for key in category_dict:
@@ -207,38 +209,55 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     name_counter = Counter()
     erargs.player_options = {}
 
+    # the file each player's yaml document comes from, in order
+    player_paths: list[str] = []
     player = 1
     while player <= args.multi:
         path = player_path_cache[player]
-        if path:
-            try:
-                settings: tuple[argparse.Namespace, ...] = settings_cache[path] if settings_cache[path] else \
-                    tuple(roll_settings(yaml, args.plando) for yaml in weights_cache[path])
-                for settingsObject in settings:
-                    for k, v in vars(settingsObject).items():
-                        if v is not None:
-                            try:
-                                getattr(erargs, k)[player] = v
-                            except AttributeError:
-                                setattr(erargs, k, {player: v})
-                            except Exception as e:
-                                raise Exception(f"Error setting {k} to {v} for player {player}") from e
-
-                    # name was not specified
-                    if player not in erargs.name:
-                        if path == args.weights_file_path:
-                            # weights file, so we need to make the name unique
-                            erargs.name[player] = f"Player{player}"
-                        else:
-                            # use the filename
-                            erargs.name[player] = os.path.splitext(os.path.split(path)[-1])[0]
-                    erargs.name[player] = handle_name(erargs.name[player], player, name_counter)
-
-                    player += 1
-            except Exception as e:
-                raise ValueError(f"File {path} is invalid. Please fix your yaml.") from e
-        else:
+        if not path:
             raise RuntimeError(f'No weights specified for player {player}')
+        player_paths.append(path)
+        player += len(weights_cache[path])
+
+    # Every yaml document is rolled with its own random seed, so the results are the same in any process and order.
+    # With sameoptions, every file is only rolled once and shared by all its players.
+    roll_paths = list(dict.fromkeys(player_paths)) if args.sameoptions else player_paths
+    roll_jobs = [(yaml, args.plando, random.getrandbits(64)) for path in roll_paths for yaml in weights_cache[path]]
+    rolls = iter(map_jobs(roll_settings_seeded, roll_jobs, get_process_count(len(roll_jobs))))
+    settings_cache: dict[str, tuple[argparse.Namespace | Exception, ...]] = {}
+    player = 1
+    for path in player_paths:
+        if args.sameoptions and path in settings_cache:
+            settings = settings_cache[path]
+        else:
+            settings = settings_cache[path] = tuple(next(rolls) for _ in weights_cache[path])
+        first_player = player
+        try:
+            for player, settingsObject in enumerate(settings, first_player):
+                if isinstance(settingsObject, Exception):
+                    raise settingsObject
+                for k, v in vars(settingsObject).items():
+                    if v is not None:
+                        try:
+                            getattr(erargs, k)[player] = v
+                        except AttributeError:
+                            setattr(erargs, k, {player: v})
+                        except Exception as e:
+                            raise Exception(f"Error setting {k} to {v} for player {player}") from e
+
+                # name was not specified
+                if player not in erargs.name:
+                    if path == args.weights_file_path:
+                        # weights file, so we need to make the name unique
+                        erargs.name[player] = f"Player{player}"
+                    else:
+                        # use the filename
+                        erargs.name[player] = os.path.splitext(os.path.split(path)[-1])[0]
+                erargs.name[player] = handle_name(erargs.name[player], player, name_counter)
+        except Exception as e:
+            errors.append((path, e))
+        player = first_player + len(settings)
+    raise_file_errors(errors)
 
     if len(set(name.lower() for name in erargs.name.values())) != len(erargs.name):
         raise Exception(f"Names have to be unique. Names: {Counter(name.lower() for name in erargs.name.values())}")
@@ -246,6 +265,64 @@ def main(args=None) -> tuple[argparse.Namespace, int]:
     return erargs, seed
 
 
+T = TypeVar("T")
+
+files_per_process = 16
+"""Player files or yaml documents that each process needs to get, to be worth starting the process."""
+
+
+def get_process_count(jobs: int) -> int:
+    from settings import get_settings
+    processes = get_settings().generator.yaml_processes or os.cpu_count() or 1
+    return max(1, min(processes, jobs // files_per_process))
+
+
+def import_worlds_lazily() -> None:
+    """Import the worlds package so that only the worlds that are played get imported, see worlds.lazy_load."""
+    if "worlds" in sys.modules:
+        return
+    lazy_worlds = os.environ.get("AP_LAZY_WORLDS", None)
+    os.environ["AP_LAZY_WORLDS"] = "1"
+    try:
+        importlib.import_module("worlds")
+    finally:
+        # not inherited by processes started later, like the WebHost generator's or launched tools
+        if lazy_worlds is None:
+            del os.environ["AP_LAZY_WORLDS"]
+        else:
+            os.environ["AP_LAZY_WORLDS"] = lazy_worlds
+
+
+def map_jobs(function: Callable[..., T], jobs: list[tuple[Any, ...]], processes: int = 1) -> list[T | Exception]:
+    """
+    Call function with the arguments of each job, in a pool of processes if there are more than one.
+    Exceptions are returned in place of the result, so that the errors of all jobs can be reported together.
+    """
+    if processes > 1:
+        with concurrent.futures.ProcessPoolExecutor(processes, initializer=import_worlds_lazily) as pool:
+            futures = [pool.submit(function, *job) for job in jobs]
+            return [future.exception() or future.result() for future in futures]
+    results: list[T | Exception] = []
+    for job in jobs:
+        try:
+            results.append(function(*job))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def raise_file_errors(errors: list[tuple[str, Exception]]) -> None:
+    """Raise an error for all the given files with invalid yamls at once, logging what was wrong with each."""
+    if len(errors) > 1:
+        for file, error in errors:
+            logging.error(f"File {file} is invalid:", exc_info=error)
+        raise ValueError(f"Files {', '.join(file for file, error in errors)} are invalid. "
+                         f"Please fix your yamls.") from errors[0][1]
+    if errors:
+        file, error = errors[0]
+        raise ValueError(f"File {file} is invalid. Please fix your yaml.") from error
+
+
 def read_weights_yamls(path) -> tuple[Any, ...]:
     try:
         if urllib.parse.urlparse(path).scheme in ('https', 'file'):
@@ -309,6 +386,18 @@ def get_choice(option, root, value=None) -> Any:
     raise RuntimeError(f"All options specified in \"{option}\" are weighted as zero.")
 
 
+def get_games(weights: dict) -> set[str]:
+    """Games that can be rolled from weights, not counting games set by triggers."""
+    games = weights.get("game", None)
+    if isinstance(games, str):
+        return {games}
+    if isinstance(games, dict):
+        games = [game for game, weight in games.items() if weight]
+    if isinstance(games, list):
+        return {game for game in games if isinstance(game, str)}
+    return set()
+
+
 class SafeFormatter(string.Formatter):
     def get_value(self, key, args, kwargs):
         if isinstance(key, int):
@@ -466,6 +555,12 @@ def handle_option(ret: argparse.Namespace, game_weights: dict, option_key: str,
         player_option.verify(AutoWorldRegister.world_types[ret.game], ret.name, plando_options)
 
 
+def roll_settings_seeded(weights: dict, plando_options: PlandoOptions, seed: int) -> argparse.Namespace:
+    """roll_settings using a random seeded with seed, for rolling in another process or order."""
+    random.seed(seed)
+    return roll_settings(weights, plando_options)
+
+
 def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.bosses):
     """
     Roll options from specified weights, usually originating from a .yaml options file.
@@ -581,6 +676,7 @@ def roll_alttp_settings(ret: argparse.Namespace, weights):
 
 
 if __name__ == '__main__':
+    Utils.freeze_support()
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
     erargs, seed = main()
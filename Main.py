@@ -2,11 +2,9 @@ import collections
 import concurrent.futures
 import logging
 import os
-import pickle
 import tempfile
 import time
 import zipfile
-import zlib
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
@@ -21,6 +19,11 @@ from worlds.generic.Rules import exclusion_rules, locality_rules
 __all__ = ["main"]
 
 
+def is_compressed(path: str) -> bool:
+    """If the file is compressed already, so deflating it again in the output zip would only cost time."""
+    return path.endswith(".archipelago") or zipfile.is_zipfile(path)
+
+
 def main(args, seed=None, baked_server_options: dict[str, object] | None = None):
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
@@ -49,18 +52,20 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # only the imported worlds, listing the others would import them
+    world_types = AutoWorld.AutoWorldRegister.world_types.loaded()
+    logger.info(f"Found {len(world_types)} World Types:")
+    longest_name = max(len(text) for text in world_types)
 
-    item_count = len(str(max(len(cls.item_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
-    location_count = len(str(max(len(cls.location_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
+    item_count = len(str(max(len(cls.item_names) for cls in world_types.values())))
+    location_count = len(str(max(len(cls.location_names) for cls in world_types.values())))
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: Items: {len(cls.item_names):{item_count}} | "
                         f"Locations: {len(cls.location_names):{location_count}}")
 
-    del item_count, location_count
+    del world_types, item_count, location_count
 
     # This assertion method should not be necessary to run if we are not outputting any multidata.
     if not args.skip_output and not args.spoiler_only:
@@ -190,7 +195,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if multiworld.algorithm == 'flood':
         flood_items(multiworld)  # different algo, biased towards early game progress items
     elif multiworld.algorithm == 'balanced':
-        distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
+        distribute_items_restrictive(multiworld, get_settings().generator.panic_method,
+                                     get_settings().generator.swap_limit)
 
     AutoWorld.call_all(multiworld, 'post_fill')
 
@@ -334,11 +340,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                    NetUtils.write_multidata(multidata, f, get_settings().generator.multidata_compression_level)
 
             output_file_futures.append(pool.submit(write_multidata))
             if not check_accessibility_task.result():
@@ -365,7 +368,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
                              compresslevel=9) as zf:
             for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+                zf.write(file.path, arcname=file.name,
+                         compress_type=zipfile.ZIP_STORED if is_compressed(file.path) else None)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
@@ -3,6 +3,7 @@ from __future__ import annotations
 import argparse
 import asyncio
 import collections
+import concurrent.futures
 import contextlib
 import copy
 import datetime
@@ -13,12 +14,14 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import shlex
 import threading
 import time
 import typing
+import uuid
 import weakref
 import zlib
 
@@ -42,14 +45,17 @@ except ImportError:
 import NetUtils
 import Utils
 from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text
-from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore, Hint, HintStatus
+from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, encode_compact, NetworkPlayer, Permission, \
+    NetworkSlot, SlotType, LocationStore, Hint, HintStatus
 from BaseClasses import ItemClassification
 
 
 min_client_version = Version(0, 5, 0)
 colorama.just_fix_windows_console()
 
+encoded_game_packages: typing.Dict[str, str] = {}
+"""game data packages encoded by Context.dumper, by checksum, shared by all contexts of the process"""
+
 
 def remove_from_list(container, value):
     try:
@@ -91,6 +97,9 @@ def queue_gc():
         gc_thread.start()
 
 
+# operations that modify a container in place, requiring a copy of the old value for SetReply
+in_place_operations = {"remove", "pop", "update"}
+
 # functions callable on storable data on the server by clients
 modify_functions = {
     # generic:
@@ -118,6 +127,15 @@ modify_functions = {
 }
 
 
+def get_sphere_lookup(spheres: typing.List[typing.Dict[int, typing.Set[int]]]) \
+        -> typing.Dict[typing.Tuple[int, int], int]:
+    """Index spheres as (player, location_id) -> sphere number."""
+    return {(player, location_id): i
+            for i, sphere in enumerate(spheres)
+            for player, location_ids in sphere.items()
+            for location_id in location_ids}
+
+
 def get_saving_second(seed_name: str, interval: int = 60) -> int:
     # save at expected times so other systems using savegame can expect it
     # represents the target second of the auto_save_interval at which to save
@@ -139,6 +157,7 @@ class Client(Endpoint):
         self.team = None
         self.slot = None
         self.send_index = 0
+        self.dropped_texts = 0
         self.tags = []
         self.messageprocessor = client_message_processor(ctx, self)
         self.ctx = weakref.ref(ctx)
@@ -166,6 +185,7 @@ class Client(Endpoint):
 
 
 team_slot = typing.Tuple[int, int]
+json_message = typing.Dict[str, typing.Any]  # a command or PrintJSON message of the network protocol
 
 
 class Context:
@@ -189,6 +209,10 @@ class Context:
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
     save_version = 2
+    # bytes waiting to be sent to a client, above which it is considered behind and gets no text messages
+    text_buffer_limit = 1024 * 1024
+    # save sections that the save journal only stores changed keys of
+    journaled_save_sections = ("location_checks", "hints", "stored_data")
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
@@ -204,6 +228,8 @@ class Context:
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    sphere_lookup: typing.Dict[typing.Tuple[int, int], int]
+    """ (player, location_id) -> sphere, indexed from spheres """
     logger: logging.Logger
 
     def __init__(self, host: str, port: int, server_password: str, password: str, location_check_points: int,
@@ -232,6 +258,16 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.new_item_slots: typing.Set[team_slot] = set()  # slots with ReceivedItems yet to be sent
+        self.new_items_scheduled = False
+        # batches of (target, PrintJSON messages), with None targeting all authenticated clients, int a team and
+        # Client a single client. Each batch is sent on the next event loop iteration, or right before a packet
+        # that was sent or scheduled after it, whichever comes first.
+        self.pending_texts: typing.Deque[typing.List[typing.Tuple[typing.Union[None, int, Client],
+                                                                  typing.List[json_message]]]] = collections.deque()
+        self.text_batches_queued = 0
+        self.text_batches_sent = 0
+        self.text_batch_open = False  # if texts can still be added to the last batch
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -239,11 +275,17 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) -> hints that may still change when that location gets checked
+        self.unfound_hints: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = {}
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
         self.item_cheat = item_cheat
         self.exit_event = asyncio.Event()
+        try:
+            self.main_loop: typing.Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:  # not created by a running server, like in tests
+            self.main_loop = None
         self.client_activity_timers: typing.Dict[
             team_slot, datetime.datetime] = {}  # datetime of last new item check
         self.client_connection_timers: typing.Dict[
@@ -257,6 +299,12 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        # save sections journaled by key -> keys changed since the last save
+        self.changed_save_data: typing.Dict[str, typing.Set[typing.Any]] = collections.defaultdict(set)
+        # (team, slot, remote_items) -> amount of received items already saved
+        self.saved_received_items: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+        self.save_journal_size: typing.Optional[int] = None  # None writes a full snapshot on next save
+        self.save_snapshot_size = 0
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -266,8 +314,14 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        # clients that only want the operations of a Set, instead of the whole value
+        self.stored_data_operations_clients: typing.Dict[str, typing.MutableSet[Client]] = \
+            collections.defaultdict(weakref.WeakSet)
+        # key -> list in stored_data, set of its entries, its length at the time; for the update operation
+        self.stored_list_entries: typing.Dict[str, typing.Tuple[list, set, int]] = {}
         self.read_data = {}
         self.spheres = []
+        self.sphere_lookup = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -327,11 +381,42 @@ class Context:
     def location_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
+    def get_encoded_data_package(self, games: typing.Iterable[str]) -> str:
+        """
+        Returns the encoded DataPackage message for games. The game data packages are encoded once per checksum and
+        shared, so answering the GetDataPackage of every connecting client doesn't re-encode megabytes of names.
+        """
+        if self.dumper is not encode:
+            return self.dumper([{"cmd": "DataPackage",
+                                 "data": {"games": {game: self.gamespackage[game] for game in games}}}])
+        fragments = []
+        for game in games:
+            game_package = self.gamespackage[game]
+            checksum = game_package.get("checksum")
+            encoded_package = encoded_game_packages.get(checksum) if checksum else None
+            if encoded_package is None:
+                encoded_package = encode(game_package)
+                if checksum:
+                    encoded_game_packages[checksum] = encoded_package
+            fragments.append(f"{encode(game)}:{encoded_package}")
+        return f'[{{"cmd":"DataPackage","data":{{"games":{{{",".join(fragments)}}}}}}}]'
+
     # General networking
-    async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
+    # The send methods first send the texts queued before they were called, also when the returned coroutine only
+    # runs later as a task. Texts queued after the call are sent after the packet.
+
+    def send_msgs(self, endpoint: Endpoint,
+                  msgs: typing.Iterable[json_message]) -> typing.Coroutine[typing.Any, typing.Any, bool]:
+        return self._send_msgs(endpoint, msgs, self.close_text_batch())
+
+    async def _send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[json_message], text_batches: int) -> bool:
+        self.flush_texts(text_batches)
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
+        if self.dumper is encode and "CompactTuples" in getattr(endpoint, "tags", ()):
+            msg = encode_compact(msgs)
+        else:
+            msg = self.dumper(msgs)
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -343,7 +428,11 @@ class Context:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
 
-    async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
+    def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> typing.Coroutine[typing.Any, typing.Any, bool]:
+        return self._send_encoded_msgs(endpoint, msg, self.close_text_batch())
+
+    async def _send_encoded_msgs(self, endpoint: Endpoint, msg: str, text_batches: int) -> bool:
+        self.flush_texts(text_batches)
         if not endpoint.socket or not endpoint.socket.open:
             return False
         try:
@@ -357,7 +446,13 @@ class Context:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
 
-    async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+    def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint],
+                                    msg: str) -> typing.Coroutine[typing.Any, typing.Any, bool]:
+        return self._broadcast_send_encoded_msgs(endpoints, msg, self.close_text_batch())
+
+    async def _broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str,
+                                           text_batches: int) -> bool:
+        self.flush_texts(text_batches)
         sockets = []
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
@@ -372,31 +467,122 @@ class Context:
                 self.logger.info(f"Outgoing broadcast: {msg}")
             return True
 
-    def broadcast_all(self, msgs: typing.List[dict]):
-        msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
+    def call_soon(self, callback: typing.Callable[..., typing.Any], *args: typing.Any) -> None:
+        """Calls callback on the next iteration of the server's event loop, also when called from another thread.
+        Without a running event loop it is called right away."""
+        if self.main_loop and self.main_loop.is_running():
+            self.main_loop.call_soon_threadsafe(callback, *args)
+        else:
+            callback(*args)
+
+    def run_on_main_loop(self, function: typing.Callable[[], typing.Any]) -> typing.Any:
+        """Calls function on the server's event loop and waits for its result, when called from another thread while
+        the loop is running. Otherwise it is called right away."""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if not self.main_loop or not self.main_loop.is_running() or running_loop is self.main_loop:
+            return function()
+        future = concurrent.futures.Future()
+
+        def run() -> None:
+            try:
+                future.set_result(function())
+            except BaseException as e:
+                future.set_exception(e)
+
+        self.main_loop.call_soon_threadsafe(run)
+        return future.result()
+
+    def queue_texts(self, target: typing.Union[None, int, Client], msgs: typing.Iterable[json_message]):
+        """Queue PrintJSON messages for target, see pending_texts.
+        Messages queued for the same target in a row are sent together."""
+        if not self.text_batch_open:
+            self.pending_texts.append([(target, list(msgs))])
+            self.text_batches_queued += 1
+            self.text_batch_open = True
+            self.call_soon(self.flush_texts, self.text_batches_queued)
+        elif self.pending_texts[-1][-1][0] == target:
+            self.pending_texts[-1][-1][1].extend(msgs)
+        else:
+            self.pending_texts[-1].append((target, list(msgs)))
+
+    def close_text_batch(self) -> int:
+        """Returns the number of text batches queued so far, which are to be sent before a packet sent or scheduled
+        now. Texts queued after this start a new batch."""
+        self.text_batch_open = False
+        return self.text_batches_queued
+
+    def flush_texts(self, text_batches: typing.Optional[int] = None):
+        """Sends the pending texts of the first text_batches batches queued, of all if None."""
+        if text_batches is None:
+            text_batches = self.text_batches_queued
+        while self.text_batches_sent < text_batches:
+            self.text_batches_sent += 1
+            self.send_text_batch(self.pending_texts.popleft())
+        if self.text_batches_sent == self.text_batches_queued:
+            self.text_batch_open = False
+
+    def send_text_batch(self,
+                        batch: typing.List[typing.Tuple[typing.Union[None, int, Client], typing.List[json_message]]]):
+        for target, msgs in batch:
+            if target is None:
+                endpoints = (endpoint for endpoint in self.endpoints if endpoint.auth and not endpoint.no_text)
+            elif isinstance(target, int):
+                endpoints = (endpoint for endpoint in itertools.chain.from_iterable(self.clients[target].values())
+                             if not endpoint.no_text)
+            else:
+                endpoints = (target,)
+            sockets = []
+            for endpoint in endpoints:
+                if not endpoint.socket or not endpoint.socket.open:
+                    continue
+                transport = getattr(endpoint.socket, "transport", None)
+                if transport and transport.get_write_buffer_size() > self.text_buffer_limit:
+                    # client can't keep up, text is the least important, so it gets skipped
+                    endpoint.dropped_texts += len(msgs)
+                    continue
+                sockets.append(endpoint.socket)
+            if not sockets:
+                continue
+            # split into chunks that are close to compression window of 64K but not too big on the wire
+            # (roughly 1300-2600 bytes after compression depending on repetitiveness)
+            for start in range(0, len(msgs), 140):
+                data = self.dumper(msgs[start:start + 140])
+                try:
+                    websockets.broadcast(sockets, data)
+                except RuntimeError:
+                    self.logger.exception("Exception during flush_texts")
+                else:
+                    if self.log_network:
+                        self.logger.info(f"Outgoing broadcast: {data}")
+
+    def broadcast_all(self, msgs: typing.List[json_message]):
+        if all(msg["cmd"] == "PrintJSON" for msg in msgs):
+            self.queue_texts(None, msgs)
+            return
         data = self.dumper(msgs)
         endpoints = (
             endpoint
             for endpoint in self.endpoints
-            if endpoint.auth and not (msg_is_text and endpoint.no_text)
+            if endpoint.auth
         )
         async_start(self.broadcast_send_encoded_msgs(endpoints, data))
 
-    def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
+    def broadcast_text_all(self, text: str, additional_arguments: typing.Dict[str, typing.Any] = {}):
         self.logger.info("Notice (all): %s" % text)
         self.broadcast_all([{**{"cmd": "PrintJSON", "data": [{ "text": text }]}, **additional_arguments}])
 
-    def broadcast_team(self, team: int, msgs: typing.List[dict]):
-        msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
+    def broadcast_team(self, team: int, msgs: typing.List[json_message]):
+        if all(msg["cmd"] == "PrintJSON" for msg in msgs):
+            self.queue_texts(team, msgs)
+            return
         data = self.dumper(msgs)
-        endpoints = (
-            endpoint
-            for endpoint in itertools.chain.from_iterable(self.clients[team].values())
-            if not (msg_is_text and endpoint.no_text)
-        )
+        endpoints = itertools.chain.from_iterable(self.clients[team].values())
         async_start(self.broadcast_send_encoded_msgs(endpoints, data))
 
-    def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
+    def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[json_message]):
         msgs = self.dumper(msgs)
         async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
 
@@ -411,14 +597,13 @@ class Context:
         if not client.auth or client.no_text:
             return
         self.logger.info("Notice (Player %s in team %d): %s" % (client.name, client.team + 1, text))
-        async_start(self.send_msgs(client, [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}]))
+        self.queue_texts(client, [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}])
 
     def notify_client_multiple(self, client: Client, texts: typing.List[str], additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
-        async_start(self.send_msgs(client,
-                                   [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
-                                    for text in texts]))
+        self.queue_texts(client, [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
+                                  for text in texts])
 
     # loading
     def load(self, multidatapath: str, use_embedded_server_options: bool = False):
@@ -439,10 +624,12 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
         format_version = data[0]
-        if format_version > 3:
+        if format_version > NetUtils.multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == NetUtils.multidata_format_version:
+            return NetUtils.MultidataSections(data)
         return restricted_loads(zlib.decompress(data[1:]))
 
     def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
@@ -487,10 +674,13 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        locations = decoded_obj.pop("locations")  # pre-emptively free memory
+        # may already be a LocationStore shared between rooms of the same seed
+        self.locations = locations if isinstance(locations, LocationStore) else LocationStore(dict(locations))
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        for slot in self.slot_data:
+            # sectioned multidata decodes a slot's slot_data only once it is first read
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -500,6 +690,8 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            for hint in hints:
+                self.index_hint(0, hint)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -530,6 +722,7 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.sphere_lookup = get_sphere_lookup(self.spheres)
 
     # saving
 
@@ -545,16 +738,113 @@ class Context:
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        """Appends the changes since the last save to the save journal,
+        or compacts everything into a new snapshot once the journal grew as big as the last snapshot."""
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if exit_save or self.save_journal_size is None or self.save_journal_size >= self.save_snapshot_size:
+                self._write_save_snapshot()
+            else:
+                self._append_save_journal()
         except Exception as e:
             self.logger.exception(e)
+            self.save_journal_size = None
             return False
         else:
             return True
 
+    def _write_save_snapshot(self):
+        journal_id = uuid.uuid4().hex
+
+        def take_save() -> bytes:
+            self.changed_save_data = collections.defaultdict(set)
+            self.saved_received_items = {key: len(items) for key, items in self.received_items.items()}
+            save_data = self.get_save()
+            save_data["journal_id"] = journal_id
+            return pickle.dumps(save_data)
+
+        # taken on the event loop, so no change made in the meantime is missing from both the snapshot and the journal
+        encoded_save = zlib.compress(self.run_on_main_loop(take_save))
+        with open(self.save_filename + ".tmp", "wb") as f:
+            f.write(encoded_save)
+        os.replace(self.save_filename + ".tmp", self.save_filename)
+        # the old journal is ignored from here on, as it no longer starts with the snapshot's journal_id
+        journal_header = self._encode_journal_entry(pickle.dumps(journal_id))
+        with open(self.save_filename + ".journal", "wb") as f:
+            f.write(journal_header)
+        self.save_journal_size = len(journal_header)
+        self.save_snapshot_size = len(encoded_save)
+
+    def _append_save_journal(self):
+        entry = self._encode_journal_entry(self.run_on_main_loop(lambda: pickle.dumps(self.get_save_delta())))
+        with open(self.save_filename + ".journal", "ab") as f:
+            f.write(entry)
+        self.save_journal_size += len(entry)
+
+    @staticmethod
+    def _encode_journal_entry(pickled_data: bytes) -> bytes:
+        entry = zlib.compress(pickled_data)
+        return len(entry).to_bytes(4, "big") + entry
+
+    def get_save_delta(self) -> typing.Dict[str, typing.Any]:
+        """Like get_save, but received_items and journaled_save_sections only contain what changed since the last
+        save. Received items are stored as (start index, new items)."""
+        changed, self.changed_save_data = self.changed_save_data, collections.defaultdict(set)
+        saved_received_items = self.saved_received_items
+        self.saved_received_items = {key: len(items) for key, items in self.received_items.items()}
+        delta = self.get_save()
+        delta["received_items"] = {
+            key: (saved_received_items.get(key, 0), items[saved_received_items.get(key, 0):])
+            for key, items in delta["received_items"].items() if key in changed["received_items"]}
+        for section in self.journaled_save_sections:
+            delta[section] = {key: delta[section][key] for key in changed[section] if key in delta[section]}
+        return delta
+
+    @classmethod
+    def apply_save_delta(cls, save_data: dict, delta: dict):
+        for section, value in delta.items():
+            if section == "received_items":
+                for key, (start, items) in value.items():
+                    save_data[section].setdefault(key, [])[start:] = items
+            elif section in cls.journaled_save_sections:
+                save_data[section].update(value)
+            else:
+                save_data[section] = value
+
+    def load_save_file(self) -> typing.Dict[str, typing.Any]:
+        """Reads the save snapshot and applies the journal written after it."""
+        with open(self.save_filename, "rb") as f:
+            encoded_save = f.read()
+        save_data = restricted_loads(zlib.decompress(encoded_save))
+        self.save_snapshot_size = len(encoded_save)
+        try:
+            with open(self.save_filename + ".journal", "rb") as f:
+                journal = f.read()
+        except FileNotFoundError:
+            return save_data
+        position = 0
+        entries = 0
+        while position + 4 <= len(journal):
+            end = position + 4 + int.from_bytes(journal[position:position + 4], "big")
+            if end > len(journal):
+                self.logger.warning("Save journal ends in an incomplete entry, skipping it.")
+                break
+            entry = restricted_loads(zlib.decompress(journal[position + 4:end]))
+            if not entries:
+                if entry != save_data.get("journal_id"):
+                    self.logger.info("Save journal does not belong to the save file, skipping it.")
+                    return save_data
+            else:
+                self.apply_save_delta(save_data, entry)
+            position = end
+            entries += 1
+        if entries:
+            # keep appending to it, cutting off an incomplete entry
+            with open(self.save_filename + ".journal", "r+b") as f:
+                f.truncate(position)
+            self.save_journal_size = position
+            self.logger.info(f"Applied {entries - 1} save journal entries.")
+        return save_data
+
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
@@ -564,9 +854,8 @@ class Context:
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
             try:
-                with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                self.set_save(self.load_save_file())
+                self.saved_received_items = {key: len(items) for key, items in self.received_items.items()}
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -604,7 +893,7 @@ class Context:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
-    def get_save(self) -> dict:
+    def get_save(self) -> typing.Dict[str, typing.Any]:
         self.recheck_hints()
         d = {
             "version": self.save_version,
@@ -640,6 +929,9 @@ class Context:
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        for (team, _), hints in savedata["hints"].items():
+            for hint in hints:
+                self.index_hint(team, hint)
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -675,6 +967,20 @@ class Context:
 
     # rest
 
+    def update_stored_list(self, key: str, container: list, entries: typing.Iterable) -> list:
+        """update_container_unique for a list in stored_data, keeping the set of its entries between calls.
+        The list is only changed in place, so a different length means that the set is outdated."""
+        known = self.stored_list_entries.get(key)
+        if known and known[0] is container and known[2] == len(container):
+            existing = known[1]
+        else:
+            existing = set(container)
+        new_entries = [entry for entry in entries if entry not in existing]
+        container.extend(new_entries)
+        existing.update(new_entries)
+        self.stored_list_entries[key] = container, existing, len(container)
+        return container
+
     def get_hint_cost(self, slot):
         if self.hint_cost:
             return max(1, int(self.hint_cost * 0.01 * len(self.locations[slot])))
@@ -686,23 +992,31 @@ class Context:
         will refresh all teams or all slots respectively. If a set is passed for 'changed', each (team,slot)
         pair that has at least one hint modified will be added to the set.
         """
-        for hint_team, hint_slot in self.hints:
+        for (hint_team, finding_player, location), hints in list(self.unfound_hints.items()):
             if team != hint_team and team is not None:
                 continue  # Check specified team only, all if team is None
-            if slot != hint_slot and slot is not None:
-                continue  # Check specified slot only, all if slot is None
-            new_hints: typing.Set[Hint] = set()
-            for hint in self.hints[hint_team, hint_slot]:
-                new_hint = hint.re_check(self, hint_team)
-                new_hints.add(new_hint)
-                if hint == new_hint:
-                    continue
-                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
-                    if changed is not None:
-                        changed.add((hint_team,player))
-                    if slot is not None and slot != player:
-                        self.replace_hint(hint_team, player, hint, new_hint)
-            self.hints[hint_team, hint_slot] = new_hints
+            if slot is not None and slot != finding_player:
+                hints = [hint for hint in hints if slot in self.slot_set(hint.receiving_player)]
+            self._recheck_hints(hint_team, hints, changed)
+
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes only the hints pointing at the specified locations of slot."""
+        for location in locations:
+            hints = self.unfound_hints.get((team, slot, location))
+            if hints:
+                self._recheck_hints(team, hints, changed)
+
+    def _recheck_hints(self, team: int, hints: typing.Iterable[Hint],
+                       changed: typing.Optional[typing.Set[team_slot]]) -> None:
+        for hint in list(hints):
+            new_hint = hint.re_check(self, team)
+            if hint == new_hint:
+                continue
+            for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                if changed is not None:
+                    changed.add((team, player))
+                self.replace_hint(team, player, hint, new_hint)
 
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
@@ -711,9 +1025,9 @@ class Context:
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
+            sphere = self.sphere_lookup.get((player, location_id))
+            if sphere is not None:
+                return sphere
             raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
                            f"Location or player may not exist.")
         return -1
@@ -773,6 +1087,7 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.index_hint(team, hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
@@ -780,6 +1095,7 @@ class Context:
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
+            self.changed_save_data["hints"].add((team, slot))
             self.on_new_hint(team, slot)
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
@@ -800,6 +1116,22 @@ class Context:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.unindex_hint(team, old_hint)
+            self.index_hint(team, new_hint)
+            self.changed_save_data["hints"].add((team, slot))
+
+    def index_hint(self, team: int, hint: Hint) -> None:
+        """Remember a hint in unfound_hints, for rechecking its location until it is found."""
+        if not hint.found:
+            self.unfound_hints.setdefault((team, hint.finding_player, hint.location), set()).add(hint)
+
+    def unindex_hint(self, team: int, hint: Hint) -> None:
+        key = team, hint.finding_player, hint.location
+        hints = self.unfound_hints.get(key)
+        if hints is not None:
+            hints.discard(hint)
+            if not hints:
+                del self.unfound_hints[key]
     
     # "events"
 
@@ -1022,20 +1354,30 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+    """Schedules sending ReceivedItems to the slots marked in ctx.new_item_slots.
+    Sending happens once on the next event loop iteration, so that a burst of checks results in one message
+    per receiving client, and slots that didn't receive anything are never looked at."""
+    if ctx.new_item_slots and not ctx.new_items_scheduled:
+        ctx.new_items_scheduled = True
+        ctx.call_soon(flush_new_items, ctx)
+
+
+def flush_new_items(ctx: Context):
+    ctx.new_items_scheduled = False
+    new_item_slots, ctx.new_item_slots = ctx.new_item_slots, set()
+    for team, slot in new_item_slots:
+        for client in ctx.clients.get(team, {}).get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                async_start(ctx.send_msgs(client, [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -1083,6 +1425,8 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.new_item_slots.add((team, target))
+        ctx.changed_save_data["received_items"].update(((team, target, False), (team, target, True)))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1109,17 +1453,13 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             ctx.logger.info('(Team #%d) %s sent %s to %s (%s)' % (
                 team + 1, ctx.player_names[(team, slot)], ctx.item_names[ctx.slot_info[target_player].game][item_id],
                 ctx.player_names[(team, target_player)], ctx.location_names[ctx.slot_info[slot].game][location]))
-            if len(info_texts) >= 140:
-                # split into chunks that are close to compression window of 64K but not too big on the wire
-                # (roughly 1300-2600 bytes after compression depending on repetitiveness)
-                ctx.broadcast_team(team, info_texts)
-                info_texts.clear()
             info_texts.append(json_format_send_event(new_item, target_player))
         ctx.broadcast_team(team, info_texts)
         del info_texts
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        ctx.changed_save_data["location_checks"].add((team, slot))
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1127,7 +1467,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1592,6 +1932,9 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.new_item_slots.add((self.client.team, self.client.slot))
+                self.ctx.changed_save_data["received_items"].update(
+                    ((self.client.team, self.client.slot, False), (self.client.team, self.client.slot, True)))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1610,9 +1953,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
         auto_status = HintStatus.HINT_UNSPECIFIED if for_location else HintStatus.HINT_PRIORITY
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.get_rechecked_hints(self.client.team, self.client.slot)
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1768,7 +2109,7 @@ def get_slot_points(ctx: Context, team: int, slot: int) -> int:
             ctx.get_hint_cost(slot) * ctx.hints_used[team, slot])
 
 
-async def process_client_cmd(ctx: Context, client: Client, args: dict):
+async def process_client_cmd(ctx: Context, client: Client, args: json_message):
     try:
         cmd: str = args["cmd"]
     except:
@@ -1858,23 +2199,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            requested = set(args.get("games", []))
+            games = [name for name in ctx.gamespackage if name in requested]
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
+            games = [name for name in ctx.gamespackage if name not in exclusions]
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = list(ctx.gamespackage)
+        await ctx.send_encoded_msgs(client, ctx.get_encoded_data_package(games))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -2045,18 +2378,32 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                               "text": 'Set', "original_cmd": cmd}])
                 return
             args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
-            args["slot"] = client.slot
-            for operation in args["operations"]:
-                func = modify_functions[operation["operation"]]
-                value = func(value, operation["value"])
-            ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
+            key = args["key"]
+            targets = set(ctx.stored_data_notification_clients[key])
             if args.get("want_reply", False):
                 targets.add(client)
+            operations_targets = set(ctx.stored_data_operations_clients[key]) - targets
+            value = ctx.stored_data.get(key, args.get("default", 0))
+            if targets and any(operation["operation"] in in_place_operations for operation in args["operations"]):
+                args["original_value"] = copy.copy(value)
+            else:
+                args["original_value"] = value  # not modified in place, so no copy needed
+            args["slot"] = client.slot
+            for operation in args["operations"]:
+                if operation["operation"] == "update" and isinstance(value, list):
+                    value = ctx.update_stored_list(key, value, operation["value"])
+                else:
+                    func = modify_functions[operation["operation"]]
+                    value = func(value, operation["value"])
+            ctx.stored_data[key] = args["value"] = value
+            ctx.changed_save_data["stored_data"].add(key)
+            if key in ctx.stored_list_entries and ctx.stored_list_entries[key][0] is not value:
+                del ctx.stored_list_entries[key]
             if targets:
                 ctx.broadcast(targets, [args])
+            if operations_targets:
+                ctx.broadcast(operations_targets, [{arg: arg_value for arg, arg_value in args.items()
+                                                    if arg not in ("value", "original_value")}])
             ctx.save()
 
         elif cmd == "SetNotify":
@@ -2064,8 +2411,14 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'SetNotify', "original_cmd": cmd}])
                 return
+            operations_only = bool(args.get("operations_only", False))
             for key in args["keys"]:
-                ctx.stored_data_notification_clients[key].add(client)
+                if operations_only and not key.startswith("_read_"):
+                    ctx.stored_data_notification_clients[key].discard(client)
+                    ctx.stored_data_operations_clients[key].add(client)
+                else:
+                    ctx.stored_data_operations_clients[key].discard(client)
+                    ctx.stored_data_notification_clients[key].add(client)
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
@@ -2394,6 +2747,20 @@ class ServerCommandProcessor(CommonCommandProcessor):
             self.ctx.broadcast_all([{"cmd": "RoomUpdate", option_name: getattr(self.ctx, option_name)}])
         return True
 
+    def _cmd_outgoing(self):
+        """Debug Tool: list clients with data waiting to be sent to them, and how many text messages they missed
+        for being too far behind."""
+        texts = []
+        for endpoint in self.ctx.endpoints:
+            transport = getattr(endpoint.socket, "transport", None)
+            buffered = transport.get_write_buffer_size() if transport else 0
+            if buffered or endpoint.dropped_texts:
+                name = endpoint.name if endpoint.auth else "Unauthenticated client"
+                texts.append(f"{name} | Waiting: {Utils.format_SI_prefix(buffered, power=1024)}B | "
+                             f"Dropped texts: {endpoint.dropped_texts}")
+        texts.insert(0, f"{len(texts)} of {len(self.ctx.endpoints)} clients are waiting for data or dropped texts.")
+        self.output("\n".join(texts))
+
     def _cmd_datastore(self):
         """Debug Tool: list writable datastorage keys and approximate the size of their values with pickle."""
         total: int = 0
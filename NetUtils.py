@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import typing
 import enum
+import pickle
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -117,6 +119,32 @@ def encode(obj: typing.Any) -> str:
     return _encode(_scan_for_TypedTuples(obj))
 
 
+def _scan_for_TypedTuples_compact(obj: typing.Any) -> typing.Any:
+    """Like _scan_for_TypedTuples, but collections of NetworkItem or NetworkPlayer are turned into one list per
+    field, {"class": "Columns", "type": "NetworkItem", "item": [...], "location": [...], ...}."""
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        data = obj._asdict()
+        data["class"] = obj.__class__.__name__
+        return data
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        if len(obj) > 1:
+            cls = type(next(iter(obj)))
+            if cls in _columnar_types and all(type(o) is cls for o in obj):
+                data = dict(zip(cls._fields, map(list, zip(*obj))))
+                data["class"] = "Columns"
+                data["type"] = cls.__name__
+                return data
+        return tuple(_scan_for_TypedTuples_compact(o) for o in obj)
+    if isinstance(obj, dict):
+        return {key: _scan_for_TypedTuples_compact(value) for key, value in obj.items()}
+    return obj
+
+
+def encode_compact(obj: typing.Any) -> str:
+    """Encoding used for clients with the CompactTuples tag, which can be decoded by decode as well."""
+    return _encode(_scan_for_TypedTuples_compact(obj))
+
+
 def get_any_version(data: dict) -> Version:
     data = {key.lower(): value for key, value in data.items()}  # .NET version classes have capitalized keys
     return Version(int(data["major"]), int(data["minor"]), int(data["build"]))
@@ -128,14 +156,31 @@ allowlist = {
     "NetworkSlot": NetworkSlot
 }
 
+# types whose fields are all plain values, so that they can be sent as columns
+_columnar_types = {NetworkItem, NetworkPlayer}
+
+
+def get_columns(data: dict) -> typing.Any:
+    cls = allowlist.get(data.get("type", None), None)
+    if cls not in _columnar_types:
+        return data
+    return [cls(*row) for row in zip(*(data[field] for field in cls._fields))]
+
+
 custom_hooks = {
     "Version": get_any_version
 }
+# packets of encode_compact, which the server only sends to clients with the CompactTuples tag, can contain columns
+compact_hooks = {
+    **custom_hooks,
+    "Columns": get_columns
+}
 
 
-def _object_hook(o: typing.Any) -> typing.Any:
+def _object_hook(o: typing.Any, hooks: typing.Dict[str, typing.Callable[[dict], typing.Any]] = custom_hooks
+                 ) -> typing.Any:
     if isinstance(o, dict):
-        hook = custom_hooks.get(o.get("class", None), None)
+        hook = hooks.get(o.get("class", None), None)
         if hook:
             return hook(o)
         cls = allowlist.get(o.get("class", None), None)
@@ -148,7 +193,12 @@ def _object_hook(o: typing.Any) -> typing.Any:
     return o
 
 
+def _compact_object_hook(o: typing.Any) -> typing.Any:
+    return _object_hook(o, compact_hooks)
+
+
 decode = JSONDecoder(object_hook=_object_hook).decode
+decode_compact = JSONDecoder(object_hook=_compact_object_hook).decode
 
 
 class Endpoint:
@@ -472,3 +522,117 @@ else:
             warnings.warn("_speedups not available. Falling back to pure python LocationStore. "
                           "Install a matching C++ compiler for your platform to compile _speedups.")
             LocationStore = _LocationStore
+
+
+multidata_format_version = 4
+# multidata entries keyed by slot, stored as one section per slot, so a reader only decodes the slots it looks at
+per_slot_multidata_sections = ("locations", "slot_data", "precollected_items", "precollected_hints", "er_hint_data",
+                               "checks_in_area")
+
+
+def write_compressed_pickle(obj: typing.Any, file: typing.BinaryIO, level: int) -> None:
+    """
+    Pickle obj into file through zlib, without holding the whole pickle in memory.
+    The output is a regular zlib stream of the pickle, which zlib.decompress turns into the same bytes as
+    pickle.dumps(obj), so streaming needs no new format version of its own.
+    """
+    compressor = zlib.compressobj(level)
+
+    class CompressingWriter:
+        @staticmethod
+        def write(data: bytes) -> int:
+            file.write(compressor.compress(data))
+            return len(data)
+
+    pickle.dump(obj, CompressingWriter())
+    file.write(compressor.flush())
+
+
+def write_multidata(multidata: typing.Mapping[str, typing.Any], file: typing.BinaryIO, level: int) -> None:
+    """
+    Write multidata as format 4: the format version byte, each entry as an independently compressed section,
+    the compressed index of the sections' (offset, length) and lastly the offset of the index as 8 bytes big endian.
+    Entries in per_slot_multidata_sections get a section per slot.
+    """
+    start = file.tell()
+    file.write(bytes([multidata_format_version]))
+
+    def write_section(value: typing.Any) -> typing.Tuple[int, int]:
+        offset = file.tell()
+        write_compressed_pickle(value, file, level)
+        return offset - start, file.tell() - offset
+
+    index: typing.Dict[str, typing.Any] = {}
+    for key, value in multidata.items():
+        if key in per_slot_multidata_sections and isinstance(value, typing.Mapping):
+            index[key] = {slot: write_section(slot_value) for slot, slot_value in value.items()}
+        else:
+            index[key] = write_section(value)
+    index_offset = file.tell() - start
+    write_compressed_pickle(index, file, level)
+    file.write(index_offset.to_bytes(8, "big"))
+
+
+class MultidataSections(typing.MutableMapping[typing.Any, typing.Any]):
+    """
+    Multidata of format 4, decoding each section on first access.
+    Assigned values replace their section, so this can be modified like the dict of older formats.
+    """
+    _data: memoryview
+    _index: typing.Dict[typing.Any, typing.Any]
+    _decoded: typing.Dict[typing.Any, typing.Any]
+    _original: typing.Optional[MultidataSections] = None
+
+    def __init__(self, data: typing.Union[bytes, memoryview],
+                 index: typing.Optional[typing.Dict[typing.Any, typing.Any]] = None) -> None:
+        self._data = memoryview(data)
+        if index is None:
+            if self._data[0] != multidata_format_version:
+                raise ValueError(f"Expected multidata format {multidata_format_version}, got {self._data[0]}.")
+            index_offset = int.from_bytes(self._data[-8:], "big")
+            index = restricted_loads(zlib.decompress(self._data[index_offset:-8]))
+        self._index = index
+        self._decoded = {}
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        location = self._index[key]
+        if self._original is not None and self._original._index.get(key, None) is location:
+            value = self._original[key]
+        elif isinstance(location, dict):
+            value = MultidataSections(self._data, location)
+        else:
+            offset, length = location
+            value = restricted_loads(zlib.decompress(self._data[offset:offset + length]))
+        self._decoded[key] = value
+        return value
+
+    def copy(self) -> MultidataSections:
+        """
+        Shallow copy, which takes the sections it did not replace from this one, so that they are only decoded once.
+        Assigning and deleting sections of the copy does not change this one.
+        """
+        copy = MultidataSections(self._data, dict(self._index))
+        copy._original = self
+        return copy
+
+    def __setitem__(self, key: typing.Any, value: typing.Any) -> None:
+        self._index.setdefault(key, None)
+        self._decoded[key] = value
+
+    def __delitem__(self, key: typing.Any) -> None:
+        del self._index[key]
+        self._decoded.pop(key, None)
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self._index)})"
@@ -13,6 +13,8 @@ import threading
 import time
 import typing
 import sys
+import weakref
+from uuid import UUID
 
 import websockets
 from pony.orm import commit, db_session, select
@@ -20,9 +22,10 @@ from pony.orm import commit, db_session, select
 import Utils
 
 from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
+from NetUtils import LocationStore
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, Seed, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -57,8 +60,30 @@ class DBCommandProcessor(ServerCommandProcessor):
         self.ctx.logger.info(text)
 
 
+class SeedData:
+    """Decoded multidata of a seed, shared read-only by all rooms of that seed in this process."""
+    __slots__ = ("multidata", "__weakref__")
+
+    def __init__(self, multidata: typing.MutableMapping[str, typing.Any]):
+        self.multidata = multidata
+
+
+# seed id -> data of seeds with at least one room running in this process
+_seed_data: "weakref.WeakValueDictionary[UUID, SeedData]" = weakref.WeakValueDictionary()
+
+
+def get_seed_data(seed: Seed) -> SeedData:
+    seed_data = _seed_data.get(seed.id)
+    if seed_data is None:
+        multidata = Context.decompress(seed.multidata)
+        multidata["locations"] = LocationStore(dict(multidata["locations"]))
+        seed_data = _seed_data[seed.id] = SeedData(multidata)
+    return seed_data
+
+
 class WebHostContext(Context):
     room_id: int
+    seed_data: SeedData
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -68,17 +93,19 @@ class WebHostContext(Context):
                                              40, True, "enabled", "enabled",
                                              "enabled", 0, 2, logger=logger)
         del self.static_server_data
-        self.main_loop = asyncio.get_running_loop()
         self.video = {}
         self.tags = ["AP", "WebHost"]
 
     def __del__(self):
+        self.log_memory("Context destroyed")
+
+    def log_memory(self, event: str):
         try:
             import psutil
             from Utils import format_SI_prefix
-            self.logger.debug(f"Context destroyed, Mem: {format_SI_prefix(psutil.Process().memory_info().rss, 1024)}iB")
+            self.logger.debug(f"{event}, Mem: {format_SI_prefix(psutil.Process().memory_info().rss, 1024)}iB")
         except ImportError:
-            self.logger.debug("Context destroyed")
+            self.logger.debug(event)
 
     def _load_game_data(self):
         for key, value in self.static_server_data.items():
@@ -86,19 +113,6 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            time.sleep(5)
-
     @db_session
     def load(self, room_id: int):
         self.room_id = room_id
@@ -108,7 +122,13 @@ class WebHostContext(Context):
         else:
             self.port = get_random_port()
 
-        multidata = self.decompress(room.seed.multidata)
+        seed_data_shared = room.seed.id in _seed_data
+        self.seed_data = get_seed_data(room.seed)
+        # the shared multidata is not modified, _load and the data package handling below only modify these copies.
+        # Sectioned multidata is copied without decoding, rooms then decode each section once for all of them.
+        multidata = self.seed_data.multidata.copy()
+        multidata["datapackage"] = {game: dict(game_data)
+                                    for game, game_data in multidata.get("datapackage", {}).items()}
         game_data_packages = {}
 
         static_gamespackage = self.gamespackage  # this is shared across all rooms
@@ -144,7 +164,10 @@ class WebHostContext(Context):
             self.gamespackage = static_gamespackage
             self.item_name_groups = static_item_name_groups
             self.location_name_groups = static_location_name_groups
-        return self._load(multidata, game_data_packages, True)
+        result = self._load(multidata, game_data_packages, True)
+        self.log_memory(f"Room loaded with {'shared' if seed_data_shared else 'newly decoded'} seed data, "
+                        f"{len(_seed_data)} seeds loaded in process")
+        return result
 
     @db_session
     def init_save(self, enabled: bool = True):
@@ -154,7 +177,7 @@ class WebHostContext(Context):
             if savegame_data:
                 self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
             self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
+        command_dispatcher.add_room(self)
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
@@ -171,6 +194,54 @@ class WebHostContext(Context):
         return d
 
 
+class DBCommandDispatcher:
+    """Fetches the commands for all rooms hosted in this process with a single query,
+    and hands them to the event loop of their room."""
+    interval = 1  # in seconds
+
+    def __init__(self):
+        self.rooms: typing.Dict[int, typing.Tuple[WebHostContext, DBCommandProcessor]] = {}
+        self.lock = threading.Lock()
+        self.thread: typing.Optional[threading.Thread] = None
+
+    def add_room(self, ctx: WebHostContext):
+        with self.lock:
+            self.rooms[ctx.room_id] = ctx, DBCommandProcessor(ctx)
+            if not self.thread:
+                self.thread = threading.Thread(target=self.run, name="DBCommandDispatcher", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while 1:
+            time.sleep(self.interval)
+            with self.lock:
+                # rooms are dropped once they are shutting down
+                for room_id, (ctx, _) in list(self.rooms.items()):
+                    if ctx.exit_event.is_set():
+                        del self.rooms[room_id]
+                rooms = dict(self.rooms)
+            if rooms:
+                try:
+                    self.dispatch(rooms)
+                except Exception as e:
+                    logging.exception(e)
+
+    @staticmethod
+    @db_session
+    def dispatch(rooms: typing.Dict[int, typing.Tuple[WebHostContext, DBCommandProcessor]]):
+        room_ids = list(rooms)
+        commands = select(command for command in Command if command.room.id in room_ids)
+        if commands:
+            for command in commands.order_by(Command.id):
+                ctx, cmdprocessor = rooms[command.room.id]
+                ctx.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
+                command.delete()
+            commit()
+
+
+command_dispatcher = DBCommandDispatcher()
+
+
 def get_random_port():
     return random.randint(49152, 65535)
 
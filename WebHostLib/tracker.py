@@ -1,7 +1,7 @@
 import datetime
 import collections
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
@@ -49,13 +49,14 @@ class TrackerData:
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
     """
     room: Room
-    _multidata: Dict[str, Any]
+    _multidata: Mapping[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
+        # sectioned multidata only decodes the sections and slots this tracker accesses
         self._multidata = Context.decompress(room.seed.multidata)
         self._multisave = restricted_loads(room.multisave) if room.multisave else {}
         self._tracker_cache = {}
@@ -4,7 +4,6 @@ import pickle
 import typing
 import uuid
 import zipfile
-import zlib
 
 from io import BytesIO
 from flask import request, flash, redirect, url_for, session, render_template, abort
@@ -14,7 +13,7 @@ from pony.orm.core import TransactionIntegrityError
 import schema
 
 import MultiServer
-from NetUtils import SlotType
+from NetUtils import SlotType, write_multidata
 from Utils import VersionException, __version__
 from worlds import GamesPackage
 from worlds.Files import AutoPatchRegister
@@ -92,7 +91,10 @@ def process_multidata(compressed_multidata, files={}):
                            game=slot_info.game))
         flush()  # commit slots
 
-    compressed_multidata = compressed_multidata[0:1] + zlib.compress(pickle.dumps(decompressed_multidata), 9)
+    # stored sectioned, so rooms and trackers decode only what they use
+    with BytesIO() as multidata_file:
+        write_multidata(decompressed_multidata, multidata_file, 9)
+        compressed_multidata = multidata_file.getvalue()
     return slots, compressed_multidata
 
 
@@ -675,6 +675,24 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class SwapLimit(int):
+        """
+        Maximum number of prior placements the swap panic method tries to swap with before giving up, 0 for no limit.
+        Every attempt has to explore the whole multiworld, so a limit bounds how long a failing generation takes.
+        """
+
+    class MultidataCompressionLevel(int):
+        """
+        zlib compression level of the multidata, from 1 (fastest) to 9 (smallest).
+        Big multiworlds take much longer to compress at the highest levels, for files that are barely smaller.
+        """
+
+    class YamlProcesses(int):
+        """
+        Number of processes to read and roll player files with, 0 for one per CPU core.
+        Processes are only started for many player files, as starting them takes longer than rolling a few.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -684,6 +702,9 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    swap_limit: SwapLimit = SwapLimit(0)
+    multidata_compression_level: MultidataCompressionLevel = MultidataCompressionLevel(6)
+    yaml_processes: YamlProcesses = YamlProcesses(0)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -0,0 +1,36 @@
+def run_network_benchmark():
+    """Compare the size and speed of the regular and the compact (CompactTuples) network encodings."""
+    import logging
+    import random
+    import timeit
+
+    from Utils import init_logging
+    from NetUtils import NetworkItem, NetworkPlayer, decode, decode_compact, encode, encode_compact
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    rng = random.Random(0)
+    messages = {
+        "ReceivedItems of 1000 items": [{"cmd": "ReceivedItems", "index": 0, "items": [
+            NetworkItem(rng.randrange(1 << 20), rng.randrange(1 << 20), rng.randrange(1, 500), rng.randrange(8))
+            for _ in range(1000)]}],
+        "ReceivedItems of 1 item": [{"cmd": "ReceivedItems", "index": 1000, "items": [NetworkItem(1, 2, 3, 1)]}],
+        "Connected with 500 players": [{"cmd": "Connected", "players": [
+            NetworkPlayer(0, slot, f"Player{slot}", f"Player{slot}") for slot in range(1, 501)]}],
+    }
+    number = 100
+
+    for name, msgs in messages.items():
+        for encoder, decoder in ((encode, decode), (encode_compact, decode_compact)):
+            data = encoder(msgs)
+            encode_time = timeit.timeit(lambda: encoder(msgs), number=number) / number
+            decode_time = timeit.timeit(lambda: decoder(data), number=number) / number
+            logger.info(f"{name} with {encoder.__name__}: {len(data)} bytes, "
+                        f"{encode_time * 1000:.3f} ms to encode, {decode_time * 1000:.3f} ms to decode.")
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_network_benchmark()
@@ -260,6 +260,25 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertRaises(FillError, fill_restrictive, multiworld, multiworld.state,
                           player1.locations.copy(), player1.prog_items.copy())
 
+    def test_swap_limit(self):
+        """Test that fill gives up swapping once it attempted as many swaps as it is allowed to"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 2, 2)
+        items = player1.prog_items
+        locations = player1.locations
+
+        multiworld.completion_condition[player1.id] = lambda state: state.has(
+            items[0].name, player1.id) and state.has(items[1].name, player1.id)
+        set_rule(locations[1], lambda state: state.has(
+            items[1].name, player1.id))
+        set_rule(locations[0], lambda state: state.has(
+            items[0].name, player1.id))
+
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertRaises(FillError, fill_restrictive, multiworld, multiworld.state,
+                              player1.locations.copy(), player1.prog_items.copy(), swap_limit=1)
+        self.assertIn("limit of 1 swap attempts", logs.output[0])
+
     def test_circular_fill(self):
         """Test that fill raises an error when it can't place all items"""
         multiworld = generate_test_multiworld()
@@ -463,6 +482,20 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_remaining_locations_keep_order(self):
+        """Test that the locations and items that are left over stay in their original order"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 60, 0, 40)
+        for location in player1.locations[::2]:
+            add_item_rule(location, lambda item: False)
+        locations = player1.locations.copy()
+
+        fill_restrictive(multiworld, multiworld.state, locations, player1.basic_items, allow_partial=True)
+
+        self.assertEqual(locations, player1.locations[::2])
+        self.assertEqual(10, len(player1.basic_items))
+        self.assertTrue(all(location.item for location in player1.locations[1::2]))
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
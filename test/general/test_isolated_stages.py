@@ -0,0 +1,48 @@
+import time
+import unittest
+from typing import List
+
+from BaseClasses import Item, ItemClassification
+from worlds.AutoWorld import call_all
+from . import generate_test_multiworld
+
+
+class TestIsolatedStages(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(4)
+        self.pool_sizes: List[int] = []
+
+    def add_create_items(self, player: int, isolated: bool, delay: float = 0) -> None:
+        world = self.multiworld.worlds[player]
+        if isolated:
+            world.isolated_stages = frozenset({"create_items"})
+
+        def create_items() -> None:
+            self.pool_sizes.append(len(self.multiworld.itempool))
+            for i in range(3):
+                # sleeping lets the other isolated worlds add their items in between
+                time.sleep(delay)
+                self.multiworld.itempool.append(Item(f"{player}_{i}", ItemClassification.filler, None, player))
+
+        world.create_items = create_items
+
+    def test_item_pool_order(self) -> None:
+        """Test that isolated worlds add their items in the order serial calls would, and don't skip ahead."""
+        self.add_create_items(1, True, 0.02)
+        self.add_create_items(2, True)
+        self.add_create_items(3, False)
+        self.add_create_items(4, True)
+        call_all(self.multiworld, "create_items")
+        self.assertEqual([item.name for item in self.multiworld.itempool],
+                         [f"{player}_{i}" for player in self.multiworld.player_ids for i in range(3)])
+        # the world that isn't isolated sees everything the worlds before it created, and nothing after
+        self.assertIn(6, self.pool_sizes)
+
+    def test_global_random_unavailable(self) -> None:
+        """Test that isolated stages can't use the multiworld's random, and that it is restored afterwards."""
+        world = self.multiworld.worlds[1]
+        world.isolated_stages = frozenset({"generate_early"})
+        world.generate_early = lambda: self.multiworld.random.random()
+        with self.assertRaises(RuntimeError):
+            call_all(self.multiworld, "generate_early")
+        self.assertIsInstance(self.multiworld.random.random(), float)
@@ -1,7 +1,10 @@
+import collections
 import unittest
+from typing import Callable, Dict, Optional
 
+from BaseClasses import CollectionState, Item, ItemClassification, Location, Region, SweepTracker
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_items, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +30,179 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestStateCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.player = 1
+        menu = self.multiworld.get_region("Menu", self.player)
+        self.key, self.other_key = generate_items(2, self.player, True)
+        self.gated = Region("Gated", self.player, self.multiworld)
+        self.multiworld.regions.append(self.gated)
+        menu.connect(self.gated, rule=lambda state: state.has(self.key.name, self.player))
+        self.event_location = Location(self.player, "Gated Event", None, self.gated)
+        self.gated.locations.append(self.event_location)
+        self.event_location.place_locked_item(Item("Gated Event", ItemClassification.progression, None, self.player))
+
+    def assertStatesEqual(self, first: CollectionState, second: CollectionState) -> None:
+        self.assertEqual(first.prog_items, second.prog_items)
+        self.assertEqual(first.reachable_regions, second.reachable_regions)
+        self.assertEqual(first.blocked_connections, second.blocked_connections)
+        self.assertEqual(first.advancements, second.advancements)
+        self.assertEqual(first.locations_checked, second.locations_checked)
+        self.assertEqual(first.path, second.path)
+
+    def test_rollback_restores_state(self) -> None:
+        """Test that rolling back a checkpoint undoes collection, reachability and sweep results."""
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.gated.can_reach(state))
+        reference = state.copy()
+        token = state.checkpoint()
+        state.collect(self.key)
+        self.assertTrue(self.gated.can_reach(state))
+        self.assertIn(self.event_location, state.advancements)
+        state.rollback(token)
+        self.assertStatesEqual(state, reference)
+        self.assertFalse(self.gated.can_reach(state))
+
+    def test_nested_checkpoints(self) -> None:
+        """Test that an inner rollback only reverts changes made after its checkpoint."""
+        state = CollectionState(self.multiworld)
+        outer = state.checkpoint()
+        state.collect(self.other_key, True)
+        after_outer = state.copy()
+        inner = state.checkpoint()
+        state.collect(self.key)
+        state.rollback(inner)
+        self.assertStatesEqual(state, after_outer)
+        state.rollback(outer)
+        self.assertFalse(state.has(self.other_key.name, self.player))
+
+    def test_commit_keeps_changes(self) -> None:
+        """Test that committing the outermost checkpoint keeps changes and stops recording."""
+        state = CollectionState(self.multiworld)
+        token = state.checkpoint()
+        state.collect(self.key)
+        state.commit(token)
+        self.assertTrue(self.gated.can_reach(state))
+        state.remove(self.key)
+        self.assertFalse(self.gated.can_reach(state))
+
+
+class TestSweepTracking(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.player = 1
+        self.menu = self.multiworld.get_region("Menu", self.player)
+        self.rule_calls: Dict[str, int] = {}
+
+    def add_event(self, name: str, rule: Callable[[CollectionState], bool],
+                  region: Optional[Region] = None) -> Location:
+        location = Location(self.player, name, None, region or self.menu)
+        location.parent_region.locations.append(location)
+
+        def counted_rule(state: CollectionState) -> bool:
+            self.rule_calls[name] = self.rule_calls.get(name, 0) + 1
+            return rule(state)
+
+        location.access_rule = counted_rule
+        location.place_locked_item(Item(name, ItemClassification.progression, None, self.player))
+        return location
+
+    def test_short_circuiting_rule(self) -> None:
+        """Test that items read only after earlier ones were collected still cause a retest."""
+        self.add_event("A", lambda state: True)
+        self.add_event("B", lambda state: state.has("A", self.player))
+        target = self.add_event("C", lambda state: state.has("A", self.player) and state.has("B", self.player))
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertIn(target, state.advancements)
+        self.assertEqual(self.rule_calls["C"], 3)
+        self.assertIs(type(state.prog_items[self.player]), collections.Counter)
+
+    def test_unrelated_locations_not_retested(self) -> None:
+        """Test that a location is only retested after something it read changed."""
+        self.add_event("A", lambda state: True)
+        self.add_event("B", lambda state: state.has("A", self.player))
+        self.add_event("C", lambda state: state.has("B", self.player))
+        unrelated = self.add_event("D", lambda state: state.has("Missing", self.player))
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertEqual(len(state.advancements), 3)
+        self.assertNotIn(unrelated, state.advancements)
+        self.assertEqual(self.rule_calls["D"], 1)
+
+    def test_region_dependency(self) -> None:
+        """Test that locations in an unreachable region are retested once the region becomes reachable."""
+        gated = Region("Gated", self.player, self.multiworld)
+        self.multiworld.regions.append(gated)
+        self.menu.connect(gated, rule=lambda state: state.has("A", self.player))
+        self.add_event("A", lambda state: True)
+        target = self.add_event("B", lambda state: True, gated)
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertIn(target, state.advancements)
+
+    def test_region_updated_between_searches(self) -> None:
+        """Test that regions becoming reachable outside of rule tests, like in completion checks, cause a retest."""
+        gated = Region("Gated", self.player, self.multiworld)
+        self.multiworld.regions.append(gated)
+        self.menu.connect(gated, rule=lambda state: state.has("A", self.player))
+        key = self.add_event("A", lambda state: True)
+        target = self.add_event("B", lambda state: True, gated)
+        state = CollectionState(self.multiworld)
+        with SweepTracker(state, [key, target]) as tracker:
+            self.assertEqual(tracker.find_reachable(), {key})
+            state.collect(key.item, True, key)
+            self.assertTrue(gated.can_reach(state))
+            self.assertEqual(tracker.find_reachable(), {target})
+
+
+class TestSweepEntranceTracking(TestSweepTracking):
+    def setUp(self) -> None:
+        super().setUp()
+        self.multiworld.worlds[self.player].explicit_indirect_conditions = False
+
+    def add_region(self, name: str, rule: Callable[[CollectionState], bool]) -> Region:
+        region = Region(name, self.player, self.multiworld)
+        self.multiworld.regions.append(region)
+
+        def counted_rule(state: CollectionState) -> bool:
+            self.rule_calls[name] = self.rule_calls.get(name, 0) + 1
+            return rule(state)
+
+        self.menu.connect(region, rule=counted_rule)
+        return region
+
+    def test_unrelated_entrances_not_retested(self) -> None:
+        """Test that a blocked entrance is only retested after something its rule read changed."""
+        gated = self.add_region("Gated", lambda state: state.has("A", self.player))
+        self.add_region("Unrelated", lambda state: state.has("Missing", self.player))
+        self.add_event("A", lambda state: True)
+        target = self.add_event("B", lambda state: True, gated)
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertIn(target, state.advancements)
+        self.assertEqual(self.rule_calls["Unrelated"], 1)
+        self.assertIs(type(state.prog_items[self.player]), collections.Counter)
+
+    def test_entrance_region_dependency(self) -> None:
+        """Test that an entrance reading an unreachable region is retested once the region becomes reachable."""
+        self.add_region("Gated", lambda state: state.has("A", self.player))
+        behind = self.add_region("Behind", lambda state: state.can_reach_region("Gated", self.player))
+        self.add_event("A", lambda state: True)
+        target = self.add_event("B", lambda state: True, behind)
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertIn(target, state.advancements)
+
+    def test_full_search_after_rule_change(self) -> None:
+        """Test that searching outside of sweeps still retests every blocked entrance."""
+        gated = self.add_region("Gated", lambda state: False)
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertFalse(gated.can_reach(state))
+        gated.entrances[0].access_rule = lambda state: True
+        state.update_reachable_regions(self.player)
+        self.assertTrue(gated.can_reach(state))
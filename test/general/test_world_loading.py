@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+
+from worlds import _update_game_packages, network_data_package, read_world_manifest, valid_world_manifest, world_sources
+from worlds.AutoWorld import AutoWorldRegister, WorldTypes
+
+
+class TestWorldTypes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world_types = WorldTypes()
+        self.loads = 0
+
+    def add_source(self, *games: str) -> None:
+        world_types = self.world_types
+
+        class Source:
+            def load(source) -> None:
+                self.loads += 1
+                for game in games:
+                    world_types[game] = type(game, (), {})
+
+        source = Source()
+        for game in games:
+            world_types.unloaded[game] = source
+
+    def test_load_on_access(self) -> None:
+        """Test that a source is imported once, when one of its games is accessed by name."""
+        self.add_source("Game 1", "Game 2")
+        self.add_source("Game 3")
+        self.assertEqual(self.world_types.loaded(), {})
+        self.assertEqual(self.world_types["Game 1"].__name__, "Game 1")
+        self.assertIn("Game 2", self.world_types)
+        self.assertIn("Game 3", self.world_types)
+        self.assertNotIn("Game 4", self.world_types)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(set(self.world_types.loaded()), {"Game 1", "Game 2"})
+        self.assertIsNone(self.world_types.get("Game 4"))
+        self.assertRaises(KeyError, lambda: self.world_types["Game 4"])
+        self.assertEqual(self.loads, 1)
+
+    def test_direct_import(self) -> None:
+        """Test that a world imported directly instead of through the registry replaces its unimported entry."""
+        self.add_source("Game 1")
+        self.world_types.register("Game 1", type("Game 1", (), {"__file__": "game_1.py"}))
+        self.assertEqual(self.world_types.unloaded, {})
+        self.assertRaises(RuntimeError, self.world_types.register, "Game 1", type("Game 1", (), {"__file__": ""}))
+        self.assertEqual(self.loads, 0)
+
+    def test_load_on_listing(self) -> None:
+        """Test that listing the games imports all sources."""
+        self.add_source("Game 1")
+        self.add_source("Game 2")
+        self.assertEqual(sorted(self.world_types), ["Game 1", "Game 2"])
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(self.world_types.unloaded, {})
+
+
+class TestWorldManifest(unittest.TestCase):
+    def test_data_package(self) -> None:
+        """Test that the manifest has the current data package of each unchanged world source."""
+        manifest = read_world_manifest()
+        for source in world_sources:
+            entry = manifest.get(source.path, None)
+            if entry and entry["signature"] == source.signature:
+                for game, game_package in entry["games"].items():
+                    with self.subTest(game):
+                        self.assertEqual(game_package, AutoWorldRegister.world_types[game].get_data_package_data())
+
+    def test_lazy_import(self) -> None:
+        """Test that the manifest's data package of a lazily imported world is replaced with the world's own."""
+        source = next((source for source in world_sources if source.path in valid_world_manifest), None)
+        if not source:
+            self.skipTest("no world manifest from an earlier run")
+        games = valid_world_manifest[source.path]["games"]
+        with mock.patch.dict(network_data_package["games"], {game: {"checksum": "outdated"} for game in games}):
+            _update_game_packages(source)
+            for game in games:
+                self.assertEqual(network_data_package["games"][game],
+                                 AutoWorldRegister.world_types[game].get_data_package_data())
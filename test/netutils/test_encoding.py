@@ -0,0 +1,37 @@
+import unittest
+
+from NetUtils import Hint, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, decode, decode_compact, encode, \
+    encode_compact
+
+
+class TestCompactEncoding(unittest.TestCase):
+    msgs = [
+        {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(i, i + 100, i % 3, i % 2) for i in range(10)]},
+        {"cmd": "LocationInfo", "locations": [NetworkItem(1, 2, 3, 4)]},
+        {"cmd": "Connected", "players": [NetworkPlayer(0, 1, "Alias", "Name"), NetworkPlayer(0, 2, "B", "B")],
+         "slot_info": {1: NetworkSlot("Name", "Game", SlotType.player)}},
+        {"cmd": "Mixed", "data": [NetworkItem(1, 2, 3), NetworkPlayer(0, 1, "A", "A"), 5]},
+    ]
+
+    def test_round_trip(self) -> None:
+        """Test that the compact encoding decodes to the same messages as the regular one."""
+        compact = encode_compact(self.msgs)
+        self.assertEqual(decode_compact(compact), decode(encode(self.msgs)))
+        self.assertLess(len(compact), len(encode(self.msgs)))
+
+    def test_item_columns(self) -> None:
+        """Test that lists of NetworkItems are sent as columns."""
+        items = [NetworkItem(1, 2, 3, 4), NetworkItem(5, 6, 7, 0)]
+        self.assertEqual(encode_compact(items),
+                         '{"item":[1,5],"location":[2,6],"player":[3,7],"flags":[4,0],'
+                         '"class":"Columns","type":"NetworkItem"}')
+
+    def test_columns_only_decoded_compact(self) -> None:
+        """Test that columns are only rebuilt for packets the server encoded compact, not in any other packet."""
+        columns = encode_compact([NetworkItem(1, 2, 3, 4), NetworkItem(5, 6, 7, 0)])
+        self.assertEqual(decode(columns)["class"], "Columns")
+
+    def test_unknown_types_kept(self) -> None:
+        """Test that types the receiver can't rebuild are encoded as before."""
+        hints = [Hint(1, 2, 3, 4, False), Hint(1, 2, 5, 6, False)]
+        self.assertEqual(encode_compact(hints), encode(hints))
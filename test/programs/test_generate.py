@@ -4,12 +4,14 @@ import unittest
 import os
 import os.path
 import sys
+import zipfile
 
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 import Generate
 import Main
+from MultiServer import Context
 
 
 class TestGenerateMain(unittest.TestCase):
@@ -25,6 +27,12 @@ class TestGenerateMain(unittest.TestCase):
         output_path = Path(output_dir)
         output_files = list(output_path.glob('*.zip'))
         if len(output_files) == 1:
+            with zipfile.ZipFile(output_files[0]) as zf:
+                for info in zf.infolist():
+                    if info.filename.endswith(".archipelago"):
+                        self.assertEqual(info.compress_type, zipfile.ZIP_STORED, "multidata is compressed already")
+                        multidata = Context.decompress(zf.read(info))
+                        self.assertEqual(multidata["slot_info"][1].name, "Player")
             return True
         self.fail(f"Expected {output_dir} to contain one zip, but has {len(output_files)}: "
                   f"{list(output_path.glob('*'))}")
@@ -126,8 +134,8 @@ class TestGenerateWeights(TestGenerateMain):
 
         # there's likely a better way to do this, but hardcode the results from seed 1 to ensure they're always this
         expected_results = {
-            "accessibility": [0, 2, 0, 2, 2],
-            "progression_balancing": [0, 50, 99, 0, 50],
+            "accessibility": [0, 0, 0, 2, 2],
+            "progression_balancing": [0, 99, 0, 99, 0],
         }
 
         self.assertEqual(seed, 1)
@@ -137,3 +145,39 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+
+class TestGenerateJobs(unittest.TestCase):
+    """Tests the parallel reading and rolling of yamls in Generate.py"""
+
+    weights_path = Path(__file__).parent / "data" / "weights" / "weights.yaml"
+
+    def test_errors_returned(self) -> None:
+        """Test that all jobs run, with exceptions in place of their results, in and out of process."""
+        jobs = [(str(self.weights_path),), ("missing.yaml",), (str(self.weights_path),)]
+        for processes in (1, 2):
+            with self.subTest(processes=processes):
+                results = Generate.map_jobs(Generate.read_weights_yamls, jobs, processes)
+                self.assertEqual(results[0][0]["game"], "Archipelago")
+                self.assertIsInstance(results[1], Exception)
+                self.assertEqual(results[2], results[0])
+
+    def test_all_errors_raised(self) -> None:
+        """Test that errors of several files are raised together."""
+        with self.assertRaisesRegex(ValueError, "a.yaml, b.yaml are invalid"), self.assertLogs(level="ERROR"):
+            Generate.raise_file_errors([("a.yaml", KeyError("game")), ("b.yaml", KeyError("name"))])
+        with self.assertRaisesRegex(ValueError, "File a.yaml is invalid"):
+            Generate.raise_file_errors([("a.yaml", KeyError("game"))])
+        Generate.raise_file_errors([])
+
+    def test_seeded_roll(self) -> None:
+        """Test that a yaml rolls the same for the same seed, whatever was rolled before."""
+        weights = Generate.read_weights_yamls(str(self.weights_path))[0]
+
+        def roll(seed: int) -> dict:
+            settings = Generate.roll_settings_seeded(weights, Generate.PlandoOptions.bosses, seed)
+            return {key: getattr(value, "value", value) for key, value in vars(settings).items()}
+
+        rolls = [roll(seed) for seed in range(10)]
+        self.assertEqual([roll(seed) for seed in range(10)], rolls)
+        self.assertGreater(len({str(rolled) for rolled in rolls}), 1)
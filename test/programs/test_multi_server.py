@@ -1,5 +1,27 @@
+import asyncio
+import io
+import os
+import pickle
+import tempfile
+import threading
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from unittest import mock
+
+from typing_extensions import override
+
+from MultiServer import Client, Context, ServerCommandProcessor, encoded_game_packages, get_sphere_lookup, \
+    process_client_cmd, send_items_to, send_new_items
+from NetUtils import Hint, HintStatus, MultidataSections, NetworkItem, decode, encode, \
+    write_compressed_pickle, write_multidata
+from worlds import GamesPackage
+
+
+def make_context() -> Context:
+    """A Context without the worlds' data packages, as those can only be loaded into one Context per process."""
+    with mock.patch.object(Context, "_load_game_data"):
+        return Context("", 0, "", "", 0, 0, False)
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +60,395 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestDataPackage(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = make_context()
+        packages: Dict[str, GamesPackage] = {
+            game: {"item_name_to_id": {f"{game} Item": 1}, "location_name_to_id": {f"{game} Location": 1},
+                   "checksum": f"test{game}"}
+            for game in ("Game A", "Game B", "Game C")
+        }
+        self.ctx.gamespackage = packages
+
+    def test_encoded_data_package(self) -> None:
+        games = ["Game A", "Game C"]
+        expected = encode([{"cmd": "DataPackage",
+                            "data": {"games": {game: self.ctx.gamespackage[game] for game in games}}}])
+        self.assertEqual(self.ctx.get_encoded_data_package(games), expected)
+        self.assertIn("testGame A", encoded_game_packages)
+        # encoded game packages are reused by checksum
+        self.ctx.gamespackage["Game A"] = {"checksum": "testGame A"}
+        self.assertEqual(self.ctx.get_encoded_data_package(games), expected)
+
+    def test_custom_dumper(self) -> None:
+        def dumper(msgs: List[Dict[str, Any]]) -> str:
+            return f"{len(msgs)} messages"
+
+        with mock.patch.object(self.ctx, "dumper", dumper):
+            self.assertEqual(self.ctx.get_encoded_data_package(["Game B"]), "1 messages")
+
+
+class TestSendNewItems(unittest.IsolatedAsyncioTestCase):
+    @override
+    async def asyncSetUp(self) -> None:
+        self.ctx = make_context()
+        self.ctx.clients = {0: {slot: [self.make_client()] for slot in (1, 2)}}
+        self.send_msgs = mock.AsyncMock(return_value=True)
+        patcher = mock.patch.object(self.ctx, "send_msgs", self.send_msgs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_client(self) -> Client:
+        client = Client(mock.Mock(), self.ctx)
+        client.items_handling = 0b111
+        return client
+
+    async def test_batched_per_receiver(self) -> None:
+        """Test that items sent in one go reach only their receiver, in one message."""
+        items = [NetworkItem(item, item, 2, 0) for item in range(3)]
+        for item in items:
+            send_items_to(self.ctx, 0, 1, item)
+            send_new_items(self.ctx)
+        # let the flush and the send tasks run
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        receiver = self.ctx.clients[0][1][0]
+        self.send_msgs.assert_called_once_with(receiver, [{"cmd": "ReceivedItems", "index": 0, "items": items}])
+        self.assertEqual(receiver.send_index, 3)
+        self.assertEqual(self.ctx.clients[0][2][0].send_index, 0)
+        self.assertFalse(self.ctx.new_item_slots)
+
+    async def test_from_other_thread(self) -> None:
+        """Test that items sent by a command from another thread are sent on the event loop."""
+        item = NetworkItem(1, 1, 2, 0)
+        send_items_to(self.ctx, 0, 1, item)
+        await asyncio.to_thread(send_new_items, self.ctx)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        receiver = self.ctx.clients[0][1][0]
+        self.send_msgs.assert_called_once_with(receiver, [{"cmd": "ReceivedItems", "index": 0, "items": [item]}])
+
+
+class TestHintIndex(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = make_context()
+        self.hints = [Hint(2, 1, location, location, False) for location in (10, 11)]
+        for hint in self.hints:
+            for slot in (1, 2):
+                self.ctx.hints[0, slot].add(hint)
+            self.ctx.index_hint(0, hint)
+
+    def test_recheck_location_hints(self) -> None:
+        """Test that checking a location updates its hints for both slots, and stops tracking them."""
+        self.ctx.location_checks[0, 1].add(10)
+        changed: Set[Tuple[int, int]] = set()
+        self.ctx.recheck_location_hints(0, 1, [10], changed)
+        found_hint = self.hints[0]._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        for slot in (1, 2):
+            self.assertEqual(self.ctx.hints[0, slot], {found_hint, self.hints[1]})
+        self.assertEqual(self.ctx.unfound_hints, {(0, 1, 11): {self.hints[1]}})
+
+    def test_recheck_hints(self) -> None:
+        """Test that a full recheck finds checks that were made without rechecking."""
+        self.ctx.location_checks[0, 1].update((10, 11))
+        self.ctx.recheck_hints()
+        self.assertTrue(all(hint.found for hint in self.ctx.hints[0, 2]))
+        self.assertFalse(self.ctx.unfound_hints)
+
+    def test_found_hint(self) -> None:
+        """Test that found hints are not indexed, even if their status was not promoted to found."""
+        hint = Hint(2, 1, 12, 12, True, status=HintStatus.HINT_PRIORITY)
+        self.ctx.hints[0, 1].add(hint)
+        self.ctx.index_hint(0, hint)
+        self.assertNotIn((0, 1, 12), self.ctx.unfound_hints)
+        self.ctx.recheck_hints()
+        self.assertIn(hint, self.ctx.hints[0, 1])
+
+
+class TestGetSphere(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        ctx = make_context()
+        ctx.spheres = [{1: {1, 2}, 2: {1}}, {1: {3}}, {2: {2, 3}}]
+        ctx.sphere_lookup = get_sphere_lookup(ctx.spheres)
+        self.assertEqual(ctx.get_sphere(1, 2), 0)
+        self.assertEqual(ctx.get_sphere(1, 3), 1)
+        self.assertEqual(ctx.get_sphere(2, 1), 0)
+        self.assertEqual(ctx.get_sphere(2, 3), 2)
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(1, 4)
+        ctx.spheres = []
+        self.assertEqual(ctx.get_sphere(1, 4), -1)
+
+
+class TestSaveJournal(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = make_context()
+        # incompressible, so that the snapshot is bigger than a few journal entries
+        self.ctx.stored_data = {"data": os.urandom(4096)}
+        self.ctx.saving = True
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.save_filename = os.path.join(temp_dir.name, "test.apsave")
+        self.ctx.save_filename = self.save_filename
+
+    def make_changes(self, step: int) -> None:
+        send_items_to(self.ctx, 0, 1, NetworkItem(step, step, 2, 0))
+        self.ctx.location_checks[0, 2].add(step)
+        self.ctx.changed_save_data["location_checks"].add((0, 2))
+        self.ctx.stored_data[f"key {step % 2}"] = step
+        self.ctx.changed_save_data["stored_data"].add(f"key {step % 2}")
+        self.ctx.client_game_state[0, 1] = step
+
+    def load(self) -> Dict[str, Any]:
+        ctx = make_context()
+        ctx.save_filename = self.save_filename
+        save_data = ctx.load_save_file()
+        del save_data["journal_id"]
+        return save_data
+
+    def test_journal(self) -> None:
+        """Test that saves only append the changes and restore the full state."""
+        self.make_changes(0)
+        self.assertTrue(self.ctx.save(now=True))
+        snapshot_size = os.path.getsize(self.save_filename)
+        for step in range(1, 4):
+            self.make_changes(step)
+            self.assertTrue(self.ctx.save(now=True))
+            self.assertEqual(os.path.getsize(self.save_filename), snapshot_size)
+            self.assertEqual(self.load(), self.ctx.get_save())
+
+    def test_compaction(self) -> None:
+        """Test that the journal gets compacted into the snapshot once it's as big as the snapshot."""
+        step = 0
+        self.ctx.save(now=True)
+        while os.path.getsize(self.save_filename + ".journal") < os.path.getsize(self.save_filename):
+            step += 1
+            self.make_changes(step)
+            self.ctx.save(now=True)
+        self.make_changes(step + 1)
+        self.ctx.save(now=True)
+        self.assertLess(os.path.getsize(self.save_filename + ".journal"), 64)
+        self.assertEqual(self.load(), self.ctx.get_save())
+
+    def test_save_thread(self) -> None:
+        """Test that saving from another thread takes the changes on the event loop, where they are made."""
+        threads: List[threading.Thread] = []
+        get_save = self.ctx.get_save
+
+        def recording_get_save() -> Dict[str, Any]:
+            threads.append(threading.current_thread())
+            return get_save()
+
+        async def save_from_thread() -> None:
+            self.ctx.main_loop = asyncio.get_running_loop()
+            for step in range(2):
+                self.make_changes(step)
+                self.assertTrue(await asyncio.to_thread(self.ctx.save, True))
+
+        with mock.patch.object(self.ctx, "get_save", recording_get_save):
+            asyncio.run(save_from_thread())
+        self.assertEqual(threads, [threading.current_thread()] * 2)
+        self.assertEqual(self.load(), get_save())
+
+    def test_incomplete_entry(self) -> None:
+        """Test that an entry cut off while writing is skipped."""
+        self.ctx.save(now=True)
+        self.make_changes(1)
+        self.ctx.save(now=True)
+        expected = self.load()
+        self.make_changes(2)
+        self.ctx.save(now=True)
+        with open(self.save_filename + ".journal", "r+b") as f:
+            f.truncate(os.path.getsize(self.save_filename + ".journal") - 1)
+        self.assertEqual(self.load(), expected)
+
+
+class TestMultidataSections(unittest.TestCase):
+    multidata = {
+        "seed_name": "12345",
+        "locations": {1: {10: (20, 2, 0)}, 2: {11: (21, 1, 1)}},
+        "slot_data": {1: {"goal": 1}, 2: {"goal": 2}},
+        "spheres": [{1: {10}}, {2: {11}}],
+    }
+
+    @override
+    def setUp(self) -> None:
+        with io.BytesIO() as file:
+            write_multidata(self.multidata, file, 6)
+            self.data = file.getvalue()
+
+    def test_round_trip(self) -> None:
+        """Test that the sectioned format decodes to the written multidata, and the old format still loads."""
+        self.assertEqual(Context.decompress(self.data), self.multidata)
+        self.assertEqual(Context.decompress(bytes([3]) + zlib.compress(pickle.dumps(self.multidata))), self.multidata)
+
+    def test_streamed_pickle(self) -> None:
+        """Test that the streamed sections decompress to the same pickle as compressing it in one go."""
+        with io.BytesIO() as file:
+            write_compressed_pickle(self.multidata, file, 6)
+            self.assertEqual(zlib.decompress(file.getvalue()), pickle.dumps(self.multidata))
+
+    def test_lazy_decode(self) -> None:
+        """Test that only the accessed sections and slots are decoded."""
+        multidata = Context.decompress(self.data)
+        with mock.patch("NetUtils.restricted_loads", wraps=pickle.loads) as loads:
+            self.assertEqual(multidata["locations"][2], {11: (21, 1, 1)})
+            self.assertEqual(multidata["locations"][2], {11: (21, 1, 1)})
+            self.assertEqual(loads.call_count, 1)
+        self.assertEqual(list(multidata), list(self.multidata))
+
+    def test_modify(self) -> None:
+        """Test that modified sections are written back out."""
+        multidata = MultidataSections(self.data)
+        multidata["slot_data"][1] = {"goal": 3}
+        del multidata["spheres"]
+        with io.BytesIO() as file:
+            write_multidata(multidata, file, 6)
+            rewritten = MultidataSections(file.getvalue())
+        self.assertEqual(rewritten["slot_data"], {1: {"goal": 3}, 2: {"goal": 2}})
+        self.assertNotIn("spheres", rewritten)
+        self.assertEqual(rewritten["locations"], self.multidata["locations"])
+
+    def test_copy(self) -> None:
+        """Test that copies decode each section only once, and can be modified without changing the original."""
+        multidata = MultidataSections(self.data)
+        first, second = multidata.copy(), multidata.copy()
+        with mock.patch("NetUtils.restricted_loads", wraps=pickle.loads) as loads:
+            self.assertEqual(first["slot_data"][1], {"goal": 1})
+            self.assertEqual(second["slot_data"][1], {"goal": 1})
+            self.assertEqual(loads.call_count, 1)
+        first["seed_name"] = "67890"
+        del first["spheres"]
+        self.assertEqual(multidata["seed_name"], "12345")
+        self.assertEqual(second["seed_name"], "12345")
+        self.assertIn("spheres", multidata)
+        self.assertEqual(first["locations"], self.multidata["locations"])
+
+
+class TestQueueTexts(unittest.IsolatedAsyncioTestCase):
+    @override
+    async def asyncSetUp(self) -> None:
+        self.ctx = make_context()
+        self.buffer_sizes = [0, 0, Context.text_buffer_limit + 1]
+        # (indices of the clients, texts of PrintJSON and cmd of other messages) per packet sent
+        self.sent: List[Tuple[List[int], List[str]]] = []
+        self.socket_indices: Dict[mock.Mock, int] = {}
+        self.ctx.endpoints = [self.make_client(i) for i in range(3)]
+        self.ctx.clients = {0: {1: self.ctx.endpoints[:2]}, 1: {1: self.ctx.endpoints[2:]}}
+        patcher = mock.patch("websockets.broadcast", self.record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_client(self, index: int) -> Client:
+        socket = mock.Mock(open=True)
+        socket.transport.get_write_buffer_size.return_value = self.buffer_sizes[index]
+
+        async def send(data: str) -> None:
+            self.record([socket], data)
+
+        socket.send = send
+        self.socket_indices[socket] = index
+        client = Client(socket, self.ctx)
+        client.auth = True
+        client.no_text = False
+        return client
+
+    def record(self, sockets: Iterable[mock.Mock], data: str) -> None:
+        self.sent.append((sorted(self.socket_indices[socket] for socket in sockets),
+                          [msg["data"][0]["text"] if msg["cmd"] == "PrintJSON" else msg["cmd"]
+                           for msg in decode(data)]))
+
+    async def test_coalesced(self) -> None:
+        """Test that texts for the same target are sent together, in order, skipping clients that are behind."""
+        self.ctx.broadcast_text_all("1")
+        self.ctx.broadcast_text_all("2")
+        self.ctx.queue_texts(self.ctx.endpoints[0], [{"cmd": "PrintJSON", "data": [{"text": "3"}]}])
+        self.ctx.broadcast_team(0, [{"cmd": "PrintJSON", "data": [{"text": "4"}]}])
+        self.assertFalse(self.sent)
+        await asyncio.sleep(0)
+        self.assertEqual(self.sent, [([0, 1], ["1", "2"]), ([0], ["3"]), ([0, 1], ["4"])])
+        self.assertEqual(self.ctx.endpoints[2].dropped_texts, 2)
+
+    async def test_before_other_packets(self) -> None:
+        """Test that texts queued before another packet are sent before it."""
+        client = self.ctx.endpoints[0]
+        self.ctx.queue_texts(client, [{"cmd": "PrintJSON", "data": [{"text": "1"}]}])
+        await self.ctx.send_msgs(client, [{"cmd": "RoomUpdate"}])
+        self.assertEqual(self.sent, [([0], ["1"]), ([0], ["RoomUpdate"])])
+
+    async def test_scheduled_packets(self) -> None:
+        """Test that packets started as tasks are sent in order with the texts queued before and after them."""
+        self.ctx.broadcast_all([{"cmd": "RoomUpdate"}])
+        self.ctx.broadcast_text_all("1")
+        self.ctx.broadcast_text_all("2")
+        self.ctx.broadcast_all([{"cmd": "Bounced"}])
+        self.ctx.broadcast_text_all("3")
+        await asyncio.sleep(0)
+        self.assertEqual([texts for _, texts in self.sent], [["RoomUpdate"], ["1", "2"], ["Bounced"], ["3"]])
+
+    def test_without_loop(self) -> None:
+        """Test that texts are sent right away when no event loop is running, like for console commands."""
+        self.ctx.main_loop = None
+        self.ctx.broadcast_text_all("1")
+        self.assertEqual(self.sent, [([0, 1], ["1"])])
+        self.assertFalse(self.ctx.pending_texts)
+
+
+class TestDataStorageSet(unittest.IsolatedAsyncioTestCase):
+    @override
+    def setUp(self) -> None:
+        self.ctx = make_context()
+        self.broadcast = mock.Mock()
+        for name, replacement in (("save", mock.Mock()), ("broadcast", self.broadcast)):
+            patcher = mock.patch.object(self.ctx, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = mock.Mock(auth=True, slot=1)
+
+    async def set(self, operations: List[Dict[str, Any]], **kwargs: Any) -> None:
+        await process_client_cmd(self.ctx, self.client, {"cmd": "Set", "key": "key", "default": [],
+                                                         "operations": operations, **kwargs})
+
+    async def test_update_list(self) -> None:
+        """Test that updating a list keeps its order and skips known entries, also after other operations."""
+        await self.set([{"operation": "update", "value": [1, 2]}])
+        await self.set([{"operation": "update", "value": [2, 3]}])
+        await self.set([{"operation": "remove", "value": 3}])
+        await self.set([{"operation": "update", "value": [3, 1]}])
+        self.assertEqual(self.ctx.stored_data["key"], [1, 2, 3])
+        await self.set([{"operation": "replace", "value": [4]}, {"operation": "update", "value": [1, 4]}])
+        self.assertEqual(self.ctx.stored_data["key"], [4, 1])
+        self.assertEqual(self.ctx.changed_save_data["stored_data"], {"key"})
+
+    async def test_notify(self) -> None:
+        """Test that subscribers get the full SetReply, or only the operations if they asked for that."""
+        full, operations_only = mock.Mock(auth=True, slot=2), mock.Mock(auth=True, slot=3)
+        for subscriber, only in ((full, False), (operations_only, True)):
+            await process_client_cmd(self.ctx, subscriber, {"cmd": "SetNotify", "keys": ["key"],
+                                                            "operations_only": only})
+        self.ctx.stored_data["key"] = [1]
+        await self.set([{"operation": "update", "value": [2]}])
+        (full_targets, [full_reply]), _ = self.broadcast.call_args_list[0]
+        (operations_targets, [operations_reply]), _ = self.broadcast.call_args_list[1]
+        self.assertEqual(full_targets, {full})
+        self.assertEqual(full_reply["original_value"], [1])
+        self.assertEqual(full_reply["value"], [1, 2])
+        self.assertEqual(operations_targets, {operations_only})
+        self.assertNotIn("value", operations_reply)
+        self.assertNotIn("original_value", operations_reply)
+        self.assertEqual(operations_reply["operations"], [{"operation": "update", "value": [2]}])
+
+    async def test_notify_registration(self) -> None:
+        """Test that a client is only registered once per key, and never operations only for special keys."""
+        for only in (True, False, True):
+            await process_client_cmd(self.ctx, self.client, {"cmd": "SetNotify", "keys": ["key", "_read_race_mode"],
+                                                             "operations_only": only})
+        self.assertEqual(set(self.ctx.stored_data_operations_clients["key"]), {self.client})
+        self.assertEqual(set(self.ctx.stored_data_notification_clients["key"]), set())
+        self.assertEqual(set(self.ctx.stored_data_notification_clients["_read_race_mode"]), {self.client})
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
+import os
 import pathlib
 import sys
 import time
@@ -16,14 +18,89 @@ from Utils import deprecate
 
 if TYPE_CHECKING:
     from BaseClasses import MultiWorld, Item, Location, Tutorial, Region, Entrance
-    from . import GamesPackage
+    from . import GamesPackage, WorldSource
     from settings import Group
 
 perf_logger = logging.getLogger("performance")
 
 
+class WorldTypes(Dict[str, Type["World"]]):
+    """
+    Registered World classes by game.
+    Games known from the world manifest are only imported when they are accessed by name,
+    listing the games imports all of them. Checking whether a game is known imports nothing.
+    """
+    unloaded: Dict[str, WorldSource]
+    """games whose source is not imported yet"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.unloaded = {}
+
+    def load(self, game: str) -> None:
+        """Import the source of game, if it was not imported yet."""
+        source = self.unloaded.get(game, None)
+        if source:
+            for other_game in [other_game for other_game, other in self.unloaded.items() if other is source]:
+                del self.unloaded[other_game]
+            source.load()
+
+    def load_all(self) -> None:
+        while self.unloaded:
+            self.load(next(iter(self.unloaded)))
+
+    def register(self, game: str, world_type: Type[World]) -> None:
+        """Add the World class of game, also when its source was imported directly instead of through load."""
+        if super().__contains__(game):
+            raise RuntimeError(f"""Game {game} already registered in 
+                {super().__getitem__(game).__file__} when attempting to register from
+                {world_type.__file__}.""")
+        self.unloaded.pop(game, None)
+        self[game] = world_type
+
+    def loaded(self) -> Dict[str, Type[World]]:
+        """The World classes that are imported already, without importing the rest."""
+        return dict(super().items())
+
+    def __missing__(self, game: str) -> Type[World]:
+        if game in self.unloaded:
+            self.load(game)
+            if super().__contains__(game):
+                return super().__getitem__(game)
+        raise KeyError(game)
+
+    def __contains__(self, game: object) -> bool:
+        return game in self.unloaded or super().__contains__(game)
+
+    def get(self, game: str, default: Any = None) -> Any:
+        try:
+            return self[game]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        self.load_all()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self.load_all()
+        return super().__len__()
+
+    def keys(self):
+        self.load_all()
+        return super().keys()
+
+    def values(self):
+        self.load_all()
+        return super().values()
+
+    def items(self):
+        self.load_all()
+        return super().items()
+
+
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    world_types: WorldTypes = WorldTypes()
     __file__: str
     zip_path: Optional[str]
     settings_key: str
@@ -85,11 +162,7 @@ class AutoWorldRegister(type):
         new_class = super().__new__(mcs, name, bases, dct)
         new_class.__file__ = sys.modules[new_class.__module__].__file__
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
-                raise RuntimeError(f"""Game {dct["game"]} already registered in 
-                {AutoWorldRegister.world_types[dct["game"]].__file__} when attempting to register from
-                {new_class.__file__}.""")
-            AutoWorldRegister.world_types[dct["game"]] = new_class
+            AutoWorldRegister.world_types.register(dct["game"], new_class)
         if ".apworld" in new_class.__file__:
             new_class.zip_path = pathlib.Path(new_class.__file__).parents[1]
         if "settings_key" not in dct:
@@ -188,19 +261,55 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
+def _check_new_items(multiworld: "MultiWorld", player: int, new_items: List["Item"]) -> None:
+    for i, item in enumerate(new_items):
+        for other in new_items[i+1:]:
+            assert item is not other, (
+                f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+
+def _call_isolated(multiworld: "MultiWorld", method_name: str, players: List[int], *args: Any) -> None:
+    """
+    Calls the method of the worlds of players, which all list it in their isolated_stages, at the same time.
+    Afterwards, the items they added to the item pool are put in the order calling them one after another would have.
+    """
+    prev_item_count = len(multiworld.itempool)
+    multiworld.random.passthrough = False
+    try:
+        with concurrent.futures.ThreadPoolExecutor(min(len(players), os.cpu_count() or 1)) as pool:
+            futures = [pool.submit(call_single, multiworld, method_name, player, *args) for player in players]
+        for future in futures:
+            future.result()
+    finally:
+        multiworld.random.passthrough = True
+
+    new_items: List["Item"] = multiworld.itempool[prev_item_count:]
+    if new_items:
+        player_order = {player: index for index, player in enumerate(players)}
+        new_items.sort(key=lambda item: player_order.get(item.player, len(players)))
+        multiworld.itempool[prev_item_count:] = new_items
+        if __debug__:
+            for player in players:
+                _check_new_items(multiworld, player, [item for item in new_items if item.player == player])
+
+
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
+    isolated_players: List[int] = []
     for player in multiworld.player_ids:
+        if method_name in multiworld.worlds[player].isolated_stages:
+            isolated_players.append(player)
+            continue
+        if isolated_players:
+            # worlds that aren't isolated may depend on what the worlds before them did, so they wait for them
+            _call_isolated(multiworld, method_name, isolated_players, *args)
+            isolated_players = []
         prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
         call_single(multiworld, method_name, player, *args)
         if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+            _check_new_items(multiworld, player, multiworld.itempool[prev_item_count:])
+    if isolated_players:
+        _call_isolated(multiworld, method_name, isolated_players, *args)
 
     call_stage(multiworld, method_name, *args)
 
@@ -315,6 +424,18 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    sweep_dependency_tracking: bool = True
+    """If True, sweeps only recheck locations of this world whose rules read an item count or region that changed,
+    and without explicit_indirect_conditions, region searches only recheck such entrances.
+    Set to False if rules depend on CollectionState data other than prog_items and Region.can_reach,
+    such as caches kept by a LogicMixin, or if entrance rules read other players' items,
+    so that all of this world's locations and entrances are rechecked every step."""
+
+    isolated_stages: ClassVar[FrozenSet[str]] = frozenset()
+    """Names of the generation steps, like "generate_early" or "create_items", that only read and change this world's
+    own data, regions, locations and items, so that they can run in parallel with the same step of other worlds.
+    These steps must only use self.random, as multiworld.random is unavailable while they run."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
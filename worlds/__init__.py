@@ -2,14 +2,16 @@ import importlib
 import importlib.util
 import logging
 import os
+import pickle
 import sys
 import warnings
 import zipimport
 import time
 import dataclasses
-from typing import Dict, List, TypedDict
+import hashlib
+from typing import Dict, List, Optional, Tuple, TypedDict
 
-from Utils import local_path, user_path
+from Utils import __version__, cache_path, local_path, user_path
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -27,6 +29,7 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "lazy_load",
 }
 
 
@@ -45,12 +48,19 @@ class DataPackage(TypedDict):
     games: Dict[str, GamesPackage]
 
 
+class WorldManifestEntry(TypedDict):
+    signature: str
+    games: Dict[str, GamesPackage]
+
+
 @dataclasses.dataclass(order=True)
 class WorldSource:
     path: str  # typically relative path from this module
     is_zip: bool = False
     relative: bool = True  # relative to regular world import folder
     time_taken: float = -1.0
+    lazy: bool = dataclasses.field(default=False, compare=False)  # registered from the world manifest, see lazy_load
+    _signature: Optional[str] = dataclasses.field(default=None, compare=False)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -61,6 +71,29 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def module_name(self) -> str:
+        return os.path.basename(self.path).rsplit(".", 1)[0]
+
+    @property
+    def signature(self) -> str:
+        """Hash of the name, size and modification time of each file, to notice changes without importing."""
+        if self._signature is None:
+            signature = hashlib.sha1()
+            if self.is_zip:
+                stat = os.stat(self.resolved_path)
+                signature.update(f"{stat.st_size} {stat.st_mtime_ns}".encode())
+            else:
+                for root, dirs, files in os.walk(self.resolved_path):
+                    dirs[:] = sorted(folder for folder in dirs if folder != "__pycache__")
+                    for file in sorted(files):
+                        path = os.path.join(root, file)
+                        stat = os.stat(path)
+                        relative_path = os.path.relpath(path, self.resolved_path)
+                        signature.update(f"{relative_path} {stat.st_size} {stat.st_mtime_ns}\n".encode())
+            self._signature = signature.hexdigest()
+        return self._signature
+
     def load(self) -> bool:
         try:
             start = time.perf_counter()
@@ -82,6 +115,8 @@ class WorldSource:
             else:
                 importlib.import_module(f".{self.path}", "worlds")
             self.time_taken = time.perf_counter()-start
+            if self.lazy:
+                _update_game_packages(self)
             return True
 
         except Exception:
@@ -93,10 +128,38 @@ class WorldSource:
             traceback.print_exc(file=file_like)
             file_like.seek(0)
             logging.exception(file_like.read())
-            failed_world_loads.append(os.path.basename(self.path).rsplit(".", 1)[0])
+            failed_world_loads.append(self.module_name)
             return False
 
 
+world_manifest_path = cache_path("world_manifest.pickle")
+world_manifest_version = 2
+
+
+def read_world_manifest() -> Dict[str, WorldManifestEntry]:
+    """Games and their data package by world source path, as of the last time the source was imported."""
+    try:
+        with open(world_manifest_path, "rb") as f:
+            manifest = pickle.load(f)
+        if manifest["version"] == (world_manifest_version, __version__):
+            return manifest["sources"]
+    except Exception as e:  # missing or unreadable, it is rebuilt from the imported worlds
+        logging.debug(f"Could not read world manifest: {e}")
+    return {}
+
+
+def write_world_manifest(sources: Dict[str, WorldManifestEntry]) -> None:
+    temp_path = f"{world_manifest_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(world_manifest_path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            pickle.dump({"version": (world_manifest_version, __version__), "sources": sources}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, world_manifest_path)
+    except OSError as e:  # read-only cache, next start just has to import everything again
+        logging.debug(f"Could not write world manifest: {e}")
+
+
 # find potential world containers, currently folders and zip-importable .apworld's
 world_sources: List[WorldSource] = []
 for folder in (folder for folder in (user_folder, local_folder) if folder):
@@ -115,15 +178,73 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
+# Set by programs that only use a few worlds, such as Generate, before importing worlds.
+# Sources that are unchanged since the world manifest was written are then imported on first access through
+# AutoWorldRegister.world_types, and until then their data package is taken from the manifest.
+lazy_load = bool(os.environ.get("AP_LAZY_WORLDS", False))
+
 # import all submodules to trigger AutoWorldRegister
 world_sources.sort()
+world_manifest = read_world_manifest()
+# entries of the sources that are unchanged since the manifest was written
+valid_world_manifest: Dict[str, WorldManifestEntry] = {
+    world_source.path: world_manifest[world_source.path] for world_source in world_sources
+    if world_source.path in world_manifest and world_manifest[world_source.path]["signature"] == world_source.signature
+}
+lazy_sources: List[WorldSource] = []
 for world_source in world_sources:
-    world_source.load()
+    if lazy_load and world_source.path in valid_world_manifest:
+        lazy_sources.append(world_source)
+    else:
+        world_source.load()
 
-# Build the data package for each game.
+# Build the data package for each game, taking it from the manifest only for the worlds that are not imported.
 from .AutoWorld import AutoWorldRegister
 
 network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
+    "games": {world_name: world.get_data_package_data()
+              for world_name, world in AutoWorldRegister.world_types.loaded().items()},
 }
+for world_source in lazy_sources:
+    for game, game_package in valid_world_manifest[world_source.path]["games"].items():
+        if game not in network_data_package["games"]:  # not imported by another world already
+            world_source.lazy = True
+            AutoWorldRegister.world_types.unloaded[game] = world_source
+            network_data_package["games"][game] = game_package
+
+
+def _update_game_packages(source: WorldSource) -> None:
+    """Replace the manifest's data packages of a lazily imported source with the ones of its worlds,
+    as the manifest's can be outdated if a world takes items or locations from outside its source."""
+    loaded = AutoWorldRegister.world_types.loaded()
+    for game in valid_world_manifest[source.path]["games"]:
+        if game in loaded:
+            network_data_package["games"][game] = loaded[game].get_data_package_data()
+
+
+def _manifest_checksums(entry: WorldManifestEntry) -> Tuple[str, Dict[str, str]]:
+    return entry["signature"], {game: game_package["checksum"] for game, game_package in entry["games"].items()}
+
+
+def _update_world_manifest() -> None:
+    games_by_module: Dict[str, List[str]] = {}
+    for game, world in AutoWorldRegister.world_types.loaded().items():
+        if world.__module__.startswith("worlds."):
+            games_by_module.setdefault(world.__module__.split(".")[1], []).append(game)
+    manifest: Dict[str, WorldManifestEntry] = {}
+    for source in world_sources:
+        if source.module_name in games_by_module and source.module_name not in failed_world_loads:
+            # imported, so its data package is up to date, also if it depends on other sources
+            manifest[source.path] = {
+                "signature": source.signature,
+                "games": {game: network_data_package["games"][game] for game in games_by_module[source.module_name]}
+            }
+        elif source.path in valid_world_manifest:
+            manifest[source.path] = valid_world_manifest[source.path]
+    if manifest.keys() != world_manifest.keys() or \
+            any(_manifest_checksums(manifest[path]) != _manifest_checksums(world_manifest[path]) for path in manifest):
+        write_world_manifest(manifest)
+
+
+_update_world_manifest()
 
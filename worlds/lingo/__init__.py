@@ -38,6 +38,7 @@ class LingoWorld(World):
 
     base_id = 444400
     topology_present = True
+    sweep_dependency_tracking = False  # level 2 logic iterates the reachable regions directly
 
     options_dataclass = LingoOptions
     options: LingoOptions
@@ -154,6 +154,7 @@ class OOTWorld(World):
     web = OOTWeb()
 
     required_client_version = (0, 4, 0)
+    sweep_dependency_tracking = False  # age reachability and drop caches live in OOTRegion and the LogicMixin
 
     item_name_groups = {
         # internal groups
@@ -110,6 +110,7 @@ class SMWorld(World):
     # changes to client DeathLink handling for 0.2.1
     # changes to client Remote Item handling for 0.2.6
     required_client_version = (0, 2, 6)
+    sweep_dependency_tracking = False  # SMBoolManager keeps its own copy of the collected items
 
     itemManager: ItemManager
 
@@ -82,6 +82,7 @@ class SMZ3World(World):
     # first added for 0.2.6
     # optimized message queues for 0.4.4
     required_client_version = (0, 4, 4)
+    sweep_dependency_tracking = False  # the SMZ3 Progression in the LogicMixin keeps its own copy of the items
 
     def __init__(self, world: MultiWorld, player: int):
         self.rom_name_available_event = threading.Event()
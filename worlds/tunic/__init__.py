@@ -82,6 +82,7 @@ class TunicWorld(World):
     """
     game = "TUNIC"
     web = TunicWeb()
+    sweep_dependency_tracking = False  # combat logic results are cached in the LogicMixin
 
     options: TunicOptions
     options_dataclass = TunicOptions